@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+CLI 启动耗时基准 (python -X importtime)
+Measure `pdfreader` startup cost and fail when it regresses.
+
+    python bench_startup.py                 # report
+    python bench_startup.py --max-ms 250    # exit 1 if import pdf_reader.cli is slower
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent / "src"
+ENV = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+
+# Backends that must never be loaded just by importing the CLI
+HEAVY_MODULES = ["pdfplumber", "pdfminer", "pypdf", "pymupdf", "fitz", "PIL", "numpy", "rich.table"]
+
+
+def run_importtime(module):
+    """Import ``module`` in a fresh interpreter and parse the -X importtime report."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=ENV,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        timings[name] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def time_command(args, repeat):
+    """Wall-clock time for running the CLI ``repeat`` times (median, ms)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", "from pdf_reader.cli import main; main()", *args],
+            capture_output=True,
+            env=ENV,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if importing the CLI takes longer")
+    opts = parser.parse_args()
+
+    runs = [run_importtime("pdf_reader.cli") for _ in range(opts.repeat)]
+    cli_ms = statistics.median(r["pdf_reader.cli"][1] for r in runs) / 1000
+    timings = runs[-1]
+
+    print("=" * 60)
+    print("pdfreader startup benchmark")
+    print("=" * 60)
+    print(f"import pdf_reader.cli : {cli_ms:8.1f} ms (median of {opts.repeat})")
+    print(f"pdfreader --help      : {time_command(['--help'], opts.repeat):8.1f} ms")
+    print()
+    print("Slowest modules (cumulative):")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative) in slowest[: opts.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    ok = True
+    loaded = set(timings)
+    leaked = [m for m in HEAVY_MODULES if m in loaded]
+    if leaked:
+        print(f"\n✗ heavy modules imported at CLI startup: {', '.join(leaked)}")
+        ok = False
+    else:
+        print("\n✓ no heavy backends imported at startup")
+
+    if opts.max_ms is not None:
+        if cli_ms > opts.max_ms:
+            print(f"✗ import time {cli_ms:.1f} ms exceeds budget {opts.max_ms:.1f} ms")
+            ok = False
+        else:
+            print(f"✓ import time within budget ({opts.max_ms:.1f} ms)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
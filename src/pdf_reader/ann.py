@@ -0,0 +1,206 @@
+"""Approximate nearest-neighbour search: IVF coarse quantizer + product quantization.
+
+Pure NumPy, for inner-product search over unit vectors such as the embeddings in
+``semantic``. Vectors are assigned to the nearest of ``nlist`` k-means centroids
+(the inverted lists); the residual to that centroid is split into ``m`` sub-vectors,
+each replaced by the id of its nearest of 256 sub-centroids, so a vector costs
+``m`` bytes instead of ``4 * dim``.
+
+A query scores only the ``nprobe`` lists whose centroids are closest, using a
+lookup table of sub-vector dot products, so ``nprobe`` trades recall for latency:
+``nprobe == nlist`` scans everything (still approximate because of PQ).
+"""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+KSUB = 256  # sub-centroids per sub-quantizer; codes fit in uint8
+TRAIN_SAMPLE = 65536  # coarse k-means trains on at most this many vectors
+PQ_TRAIN_SAMPLE = 64 * KSUB  # ...and each sub-quantizer on at most this many
+ENCODE_BATCH = 16384  # vectors assigned and encoded per step
+
+_FILES = ("centroids", "codebooks", "offsets", "ids", "codes")
+_META_FILE = "ann.json"
+
+
+def kmeans(
+    data: np.ndarray, k: int, iterations: int = 20, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Lloyd's k-means with squared Euclidean distance; returns ``(centroids, labels)``."""
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=np.float32)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    labels = np.zeros(len(data), dtype=np.int64)
+    data_sq = np.einsum("ij,ij->i", data, data)
+    for iteration in range(iterations):
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, computed as one matrix product
+        dist = data_sq[:, None] - 2 * data @ centroids.T + np.einsum("ij,ij->i", centroids, centroids)
+        new_labels = dist.argmin(axis=1)
+        if iteration and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, data)
+        counts = np.bincount(labels, minlength=k).astype(np.float32)
+        empty = counts == 0
+        centroids = sums / np.maximum(counts, 1)[:, None]
+        # Re-seed empty clusters from random points so every list stays useful
+        if empty.any():
+            centroids[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+    return centroids.astype(np.float32), labels
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray, batch: int = 16384) -> np.ndarray:
+    """Nearest centroid per row, in batches to bound the distance matrix size."""
+    centroid_sq = np.einsum("ij,ij->i", centroids, centroids)
+    labels = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), batch):
+        block = np.asarray(data[start : start + batch], dtype=np.float32)
+        labels[start : start + batch] = (centroid_sq - 2 * block @ centroids.T).argmin(axis=1)
+    return labels
+
+
+class IVFPQIndex:
+    """Inverted-file index with product-quantized residuals."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        codebooks: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        codes: np.ndarray,
+    ):
+        self.centroids = centroids  # (nlist, dim)
+        self.codebooks = codebooks  # (m, ksub, dim // m)
+        self.offsets = offsets  # (nlist + 1,) start of each list in ids/codes
+        self.ids = ids  # (n,) original row numbers, grouped by list
+        self.codes = codes  # (n, m) uint8
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def m(self) -> int:
+        return len(self.codebooks)
+
+    @staticmethod
+    def default_nlist(n: int) -> int:
+        return max(1, min(int(4 * math.sqrt(n)), n // 39 or 1, 65536))
+
+    @staticmethod
+    def sample_ids(n: int, seed: int = 0) -> np.ndarray:
+        """Rows of an ``n``-vector corpus that ``train`` learns the quantizers from."""
+        rng = np.random.default_rng(seed)
+        return rng.choice(n, size=min(n, TRAIN_SAMPLE), replace=False)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        m: int = 64,
+        seed: int = 0,
+    ) -> "IVFPQIndex":
+        """Train quantizers on ``vectors`` (a sample if large) and encode all of them."""
+        n = len(vectors)
+        sample = np.asarray(vectors[cls.sample_ids(n, seed)], dtype=np.float32)
+        batches = (vectors[start : start + ENCODE_BATCH] for start in range(0, n, ENCODE_BATCH))
+        return cls.train_batches(sample, n, batches, nlist=nlist, m=m, seed=seed)
+
+    @classmethod
+    def train_batches(
+        cls,
+        sample: np.ndarray,
+        n: int,
+        batches: Iterable[np.ndarray],
+        nlist: Optional[int] = None,
+        m: int = 64,
+        seed: int = 0,
+    ) -> "IVFPQIndex":
+        """Train quantizers on ``sample``, then encode the ``n`` vectors ``batches`` yields in order.
+
+        Only one batch of full vectors is held at a time, so the corpus never has to
+        fit in memory uncompressed; ``sample`` should be the rows ``sample_ids(n, seed)``.
+        """
+        dim = sample.shape[1]
+        if dim % m:
+            raise ValueError(f"Vector size {dim} is not divisible by m={m}")
+        nlist = nlist or cls.default_nlist(n)
+        sample = np.asarray(sample, dtype=np.float32)
+
+        centroids, sample_labels = kmeans(sample, nlist, seed=seed)
+        residuals = (sample - centroids[sample_labels]).reshape(len(sample), m, dim // m)
+        residuals = residuals[: PQ_TRAIN_SAMPLE]  # the sample is already shuffled
+        codebooks = np.stack([
+            kmeans(residuals[:, j, :], KSUB, iterations=10, seed=seed + j)[0]
+            for j in range(m)
+        ])
+        if codebooks.shape[1] < KSUB:
+            # Tiny corpora: pad so codes still index a fixed-size table
+            pad = np.repeat(codebooks[:, :1, :], KSUB - codebooks.shape[1], axis=1)
+            codebooks = np.concatenate([codebooks, pad], axis=1)
+
+        labels = np.empty(n, dtype=np.int64)
+        codes = np.empty((n, m), dtype=np.uint8)
+        start = 0
+        for block in batches:
+            block = np.asarray(block, dtype=np.float32)
+            end = start + len(block)
+            labels[start:end] = _assign(block, centroids)
+            residual = (block - centroids[labels[start:end]]).reshape(len(block), m, dim // m)
+            for j in range(m):
+                codes[start:end, j] = _assign(residual[:, j, :], codebooks[j])
+            start = end
+        if start != n:
+            raise ValueError(f"Expected {n} vectors to encode, got {start}")
+
+        order = np.argsort(labels, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=len(centroids)), out=offsets[1:])
+        return cls(centroids, codebooks, offsets, order.astype(np.int64), codes[order])
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-``k`` inner products; returns ``(scores, ids)`` best first."""
+        query = np.asarray(query, dtype=np.float32)
+        coarse = self.centroids @ query
+        nprobe = min(max(nprobe, 1), self.nlist)
+        probes = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+        # q . (c + r) = q . c + sum_j q_j . r_j, and q_j . r_j comes from a table
+        sub = query.reshape(self.m, -1)
+        table = np.einsum("mkd,md->mk", self.codebooks, sub)
+        spans = [(int(self.offsets[p]), int(self.offsets[p + 1])) for p in probes]
+        rows = np.concatenate([np.arange(a, b) for a, b in spans]) if spans else np.empty(0, np.int64)
+        if not len(rows):
+            return np.empty(0, np.float32), np.empty(0, np.int64)
+        base = np.concatenate([np.full(b - a, coarse[p], np.float32) for p, (a, b) in zip(probes, spans)])
+        scores = base + table[np.arange(self.m), np.asarray(self.codes[rows], dtype=np.intp)].sum(axis=1)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return scores[top], np.asarray(self.ids[rows[top]])
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _FILES:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        (directory / _META_FILE).write_text(
+            json.dumps({"nlist": self.nlist, "m": self.m, "n": int(len(self.ids))}), encoding="utf-8"
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["IVFPQIndex"]:
+        if not (directory / _META_FILE).exists():
+            return None
+        # Codes and ids are memory-mapped; only the probed lists are paged in
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in _FILES}
+        return cls(**arrays)
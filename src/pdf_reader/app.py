@@ -1,13 +1,116 @@
 import streamlit as st
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
 import tempfile
+import threading
+from typing import Dict, Tuple
 from pypdf import PdfReader, PdfWriter
-import pdfplumber
-from pdf2image import convert_from_path
 from PIL import Image
 import io
 
 from .cli import parse_page_ranges
+from .cache import TextCache, bytes_digest, extract_cached
+from .document import DocumentSession
+from .extractors import ENGINES
+
+PREVIEW_DPI = 150
+MAX_OPEN_PDFS = 16  # parsed uploads kept open across reruns and sessions
+
+
+@dataclass
+class ParsedPdf:
+    """An uploaded PDF, parsed once and shared by every tab, rerun and browser session."""
+
+    data: bytes
+    reader: PdfReader
+    session: DocumentSession  # MuPDF document opened from ``data``, for page previews
+    page_count: int
+    is_encrypted: bool
+    metadata: Dict[str, str]
+    # pypdf readers aren't thread-safe, and Streamlit runs each session on its own thread
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def parse(cls, digest: str, data: bytes) -> "ParsedPdf":
+        reader = PdfReader(io.BytesIO(data))
+        return cls(
+            data=data,
+            reader=reader,
+            session=DocumentSession(f"{digest}.pdf", data=data),
+            page_count=len(reader.pages),
+            is_encrypted=reader.is_encrypted,
+            metadata={str(key): str(value) for key, value in (reader.metadata or {}).items()},
+        )
+
+    def close(self) -> None:
+        with self.lock:
+            self.session.close()
+
+
+class OpenPdfs:
+    """Parsed uploads by content hash; the least recently used are closed past ``max_entries``.
+
+    ``st.cache_resource`` can't close what it evicts, so the documents are kept
+    here and only this registry is cached.
+    """
+
+    def __init__(self, max_entries: int = MAX_OPEN_PDFS):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ParsedPdf]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str, data: bytes) -> ParsedPdf:
+        with self._lock:
+            pdf = self._entries.get(digest)
+            if pdf is not None:
+                self._entries.move_to_end(digest)
+                return pdf
+        # Parsed outside the lock so other sessions aren't held up; if two sessions
+        # parse the same upload at once, the first one in wins
+        parsed = ParsedPdf.parse(digest, data)
+        with self._lock:
+            pdf = self._entries.setdefault(digest, parsed)
+            self._entries.move_to_end(digest)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+        if pdf is not parsed:
+            parsed.close()
+        for old in evicted:
+            old.close()
+        return pdf
+
+
+@st.cache_resource(show_spinner=False)
+def open_pdfs() -> OpenPdfs:
+    return OpenPdfs()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def page_png(digest: str, index: int, _pdf: ParsedPdf) -> bytes:
+    """Page ``index`` rendered at ``PREVIEW_DPI`` from the already open document."""
+    return _pdf.session.render(index, PREVIEW_DPI / 72).tobytes("png")
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def page_texts(digest: str, indexes: Tuple[int, ...], engine: str, _pdf: ParsedPdf) -> str:
+    """Text of ``indexes`` joined by blank lines, also kept in the persistent text cache."""
+    # The extraction engines read files, so the upload is on disk only for this call
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(_pdf.data)
+    try:
+        pages = extract_cached(tmp.name, indexes, engine, cache=TextCache(), digest=digest)
+        return "\n\n".join(text for _, text in pages)
+    finally:
+        Path(tmp.name).unlink(missing_ok=True)
+
+
+def open_upload(name: str) -> Tuple[str, ParsedPdf]:
+    """``(digest, parsed PDF)`` for an uploaded file; parsing only happens on a cache miss."""
+    digest = st.session_state.pdf_digests[name]
+    return digest, open_pdfs().get(digest, st.session_state.pdf_files[name])
+
 
 st.set_page_config(page_title="PDF Reader", layout="wide", initial_sidebar_state="expanded")
 
@@ -30,10 +133,15 @@ with st.sidebar:
         # Store uploaded files in session state
         if "pdf_files" not in st.session_state:
             st.session_state.pdf_files = {}
+        if "pdf_digests" not in st.session_state:
+            st.session_state.pdf_digests = {}
         
         for file in uploaded_files:
             if file.name not in st.session_state.pdf_files:
                 st.session_state.pdf_files[file.name] = file.getvalue()
+            if file.name not in st.session_state.pdf_digests:
+                # Hashed once per upload; the parsed document is cached under this key
+                st.session_state.pdf_digests[file.name] = bytes_digest(st.session_state.pdf_files[file.name])
 
 # Tabs for different operations
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
@@ -59,11 +167,9 @@ with tab1:
             )
         
         if selected_pdf:
-            pdf_bytes = st.session_state.pdf_files[selected_pdf]
-            
-            # Read PDF info
-            reader = PdfReader(io.BytesIO(pdf_bytes))
-            total_pages = len(reader.pages)
+            # Parsed once per upload, not on every rerun
+            digest, pdf = open_upload(selected_pdf)
+            total_pages = pdf.page_count
             
             with col2:
                 page_num = st.number_input(
@@ -76,19 +182,15 @@ with tab1:
             
             st.info(f"Total pages: {total_pages}")
             
-            # Generate preview image
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-                tmp.write(pdf_bytes)
-                tmp_path = tmp.name
-            
+            # Generate preview image (rendered pages are cached too)
             try:
-                images = convert_from_path(tmp_path, first_page=page_num, last_page=page_num, dpi=150)
-                if images:
-                    st.image(images[0], caption=f"Page {page_num}/{total_pages}", use_column_width=True)
+                st.image(
+                    page_png(digest, page_num - 1, pdf),
+                    caption=f"Page {page_num}/{total_pages}",
+                    use_column_width=True,
+                )
             except Exception as e:
                 st.error(f"Preview error: {e}")
-            finally:
-                Path(tmp_path).unlink(missing_ok=True)
     else:
         st.info("📤 Upload a PDF file to preview")
 
@@ -103,11 +205,10 @@ with tab2:
             key="extract_pdf"
         )
         
-        pdf_bytes = st.session_state.pdf_files[selected_pdf]
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        total_pages = len(reader.pages)
+        digest, pdf = open_upload(selected_pdf)
+        total_pages = pdf.page_count
         
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
             page_range = st.text_input(
                 "Page ranges (e.g., '1,3-5'):",
@@ -116,20 +217,18 @@ with tab2:
             )
         
         with col2:
+            engine = st.selectbox(
+                "Engine:",
+                ENGINES,
+                index=ENGINES.index("pdfplumber"),
+                help="auto uses the fast PyMuPDF engine; pdfplumber is layout-aware but slower"
+            )
+        
+        with col3:
             if st.button("🔄 Extract", key="extract_btn"):
                 try:
-                    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-                        tmp.write(pdf_bytes)
-                        tmp_path = tmp.name
-                    
-                    with pdfplumber.open(tmp_path) as doc:
-                        indexes = parse_page_ranges(page_range or None, len(doc.pages))
-                        texts = []
-                        for idx in indexes:
-                            text = doc.pages[idx].extract_text() or ""
-                            texts.append(text)
-                    
-                    combined_text = "\n\n".join(texts)
+                    indexes = parse_page_ranges(page_range or None, total_pages)
+                    combined_text = page_texts(digest, tuple(indexes), engine, pdf)
                     
                     st.text_area("Extracted Text:", value=combined_text, height=400)
                     
@@ -139,8 +238,6 @@ with tab2:
                         file_name=f"{Path(selected_pdf).stem}_extracted.txt",
                         mime="text/plain"
                     )
-                    
-                    Path(tmp_path).unlink(missing_ok=True)
                 except Exception as e:
                     st.error(f"Error: {e}")
     else:
@@ -157,9 +254,8 @@ with tab3:
             key="split_pdf"
         )
         
-        pdf_bytes = st.session_state.pdf_files[selected_pdf]
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        total_pages = len(reader.pages)
+        _, pdf = open_upload(selected_pdf)
+        total_pages = pdf.page_count
         
         page_range = st.text_input(
             "Page ranges to keep (e.g., '1,3-5'):",
@@ -171,8 +267,9 @@ with tab3:
             try:
                 indexes = parse_page_ranges(page_range, total_pages)
                 writer = PdfWriter()
-                for idx in indexes:
-                    writer.add_page(reader.pages[idx])
+                with pdf.lock:
+                    for idx in indexes:
+                        writer.add_page(pdf.reader.pages[idx])
                 
                 output = io.BytesIO()
                 writer.write(output)
@@ -223,10 +320,10 @@ with tab4:
                 try:
                     writer = PdfWriter()
                     for pdf_name in ordered_pdfs:
-                        pdf_bytes = st.session_state.pdf_files[pdf_name]
-                        reader = PdfReader(io.BytesIO(pdf_bytes))
-                        for page in reader.pages:
-                            writer.add_page(page)
+                        _, pdf = open_upload(pdf_name)
+                        with pdf.lock:
+                            for page in pdf.reader.pages:
+                                writer.add_page(page)
                     
                     output = io.BytesIO()
                     writer.write(output)
@@ -257,21 +354,20 @@ with tab5:
             key="info_pdf"
         )
         
-        pdf_bytes = st.session_state.pdf_files[selected_pdf]
-        reader = PdfReader(io.BytesIO(pdf_bytes))
+        _, pdf = open_upload(selected_pdf)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Pages", len(reader.pages))
+            st.metric("Pages", pdf.page_count)
         with col2:
-            st.metric("Encrypted", reader.is_encrypted)
+            st.metric("Encrypted", pdf.is_encrypted)
         with col3:
-            file_size_kb = len(pdf_bytes) / 1024
+            file_size_kb = len(st.session_state.pdf_files[selected_pdf]) / 1024
             st.metric("File Size", f"{file_size_kb:.1f} KB")
         
         st.subheader("Metadata")
-        if reader.metadata:
-            for key, value in reader.metadata.items():
+        if pdf.metadata:
+            for key, value in pdf.metadata.items():
                 st.write(f"**{key.lstrip('/')}:** {value}")
         else:
             st.info("No metadata found")
@@ -0,0 +1,297 @@
+"""Persistent, content-addressed cache for extracted page text."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from dataclasses import asdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .extractors import Extractor, TextBlock, open_extractor, resolve_engine
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_HASH_BLOCK = 1024 * 1024
+# Running total of entry bytes, shared by every process using the cache directory
+_SIZE_FILE = "size"
+_SIZE_FLUSH_BYTES = 1024 * 1024  # an instance adds its writes to the total in steps this big
+
+# (path, size, mtime_ns) -> sha256, so repeated lookups in one process skip rehashing
+_digest_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def default_cache_dir() -> Path:
+    """Return ``$PDFREADER_CACHE_DIR`` or ``$XDG_CACHE_HOME/pdfreader`` (``~/.cache/pdfreader``)."""
+    override = os.environ.get("PDFREADER_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pdfreader"
+
+
+def bytes_digest(data: bytes) -> str:
+    """Content hash for an in-memory PDF."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """Content hash for a PDF on disk, memoized on size and mtime."""
+    path = Path(path)
+    st = path.stat()
+    memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    digest = _digest_memo.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+                h.update(block)
+        digest = _digest_memo[memo_key] = h.hexdigest()
+    return digest
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Write then rename so concurrent readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class TextCache:
+    """Size-bounded on-disk LRU of extracted page text.
+
+    Entries are plain UTF-8 files named by a hash of (document digest, page index,
+    engine, options). A hit refreshes the entry's mtime; when the cache grows past
+    ``max_bytes`` the least recently used entries are deleted first.
+
+    The total size is tracked in a small ``size`` file next to the entries rather
+    than counted on startup, so opening a cache (or a copy of one in a worker
+    process) never scans the directory; only ``evict`` does, and it corrects the
+    total. Concurrent writers can make the total drift a little between evictions.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # shared total as last read or written
+        self._pending = 0  # bytes this instance wrote that the total doesn't include yet
+
+    def __getstate__(self) -> dict:
+        # A copy sent to a worker process starts with no size bookkeeping of its own
+        return {**self.__dict__, "_size": None, "_pending": 0}
+
+    @staticmethod
+    def key(digest: str, index: int, engine: str, options: Optional[dict] = None) -> str:
+        raw = f"{digest}:{index}:{engine}:{json.dumps(options or {}, sort_keys=True)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.txt"
+
+    def _entries(self) -> Iterator[Path]:
+        if self.root.exists():
+            yield from self.root.glob("??/*.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            # Decode the bytes directly: read_text() would translate \r and \r\n to \n
+            text = path.read_bytes().decode("utf-8")
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = text.encode("utf-8")
+        _write_atomic(path, data)
+
+        self._pending += len(data)
+        if self._size is None or self._pending >= _SIZE_FLUSH_BYTES:
+            self._flush_size()
+        if self._size + self._pending > self.max_bytes:
+            self.evict()
+
+    def _flush_size(self) -> None:
+        """Add this instance's unrecorded bytes to the shared total."""
+        try:
+            size = int((self.root / _SIZE_FILE).read_text(encoding="ascii")) + self._pending
+        except (FileNotFoundError, ValueError):
+            # No total yet (new or older cache): count once, which includes the pending bytes
+            size = self.stats()["bytes"]
+        self._write_size(size)
+
+    def _write_size(self, size: int) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.root / _SIZE_FILE, str(size).encode("ascii"))
+        self._size = size
+        self._pending = 0
+
+    def get_page_count(self, digest: str) -> Optional[int]:
+        value = self.get(self.key(digest, -1, "page_count"))
+        return int(value) if value else None
+
+    def put_page_count(self, digest: str, count: int) -> None:
+        self.put(self.key(digest, -1, "page_count"), str(count))
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """Delete least recently used entries until the cache fits ``target_bytes``.
+
+        Defaults to 90% of ``max_bytes`` so back-to-back puts don't rescan every time.
+        Returns the number of entries removed.
+        """
+        if target_bytes is None:
+            target_bytes = int(self.max_bytes * 0.9)
+        entries = []
+        total = 0
+        for path in self._entries():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+            total += st.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._write_size(total)
+        return removed
+
+    def stats(self) -> dict:
+        entries = 0
+        total = 0
+        for path in self._entries():
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+            entries += 1
+        return {"root": str(self.root), "entries": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+    def clear(self) -> int:
+        removed = 0
+        for path in list(self._entries()):
+            path.unlink(missing_ok=True)
+            removed += 1
+        for sub in self.root.glob("??") if self.root.exists() else ():
+            try:
+                sub.rmdir()
+            except OSError:
+                pass
+        if self.root.exists():
+            self._write_size(0)
+        return removed
+
+
+def extract_cached(
+    pdf: Union[str, Path],
+    indexes: Iterable[int],
+    engine: str = "pdfplumber",
+    layout: bool = False,
+    cache: Optional[TextCache] = None,
+    digest: Optional[str] = None,
+    extractor: Optional[Extractor] = None,
+) -> Iterator[Tuple[int, str]]:
+    """Yield ``(index, text)`` for ``indexes``, serving pages from ``cache`` when possible.
+
+    The PDF is only opened on the first cache miss, so a fully cached document costs
+    one small file read per page. Without a cache this is plain extraction. Pass an
+    open ``extractor`` (for ``engine``) to reuse it on misses; it is left open.
+    """
+    engine = resolve_engine(engine, layout)
+    options = {"layout": layout}
+    if cache is not None and digest is None:
+        digest = file_digest(pdf)
+
+    owned = extractor is None
+    try:
+        for idx in indexes:
+            key = TextCache.key(digest, idx, engine, options) if cache is not None else ""
+            text = cache.get(key) if cache is not None else None
+            if text is None:
+                if extractor is None:
+                    extractor = open_extractor(pdf, engine, layout=layout)
+                text = extractor.extract_page(idx)
+                if cache is not None:
+                    cache.put(key, text)
+            yield idx, text
+    finally:
+        if owned and extractor is not None:
+            extractor.close()
+
+
+def extract_blocks_cached(
+    pdf: Union[str, Path],
+    indexes: Iterable[int],
+    engine: str = "pdfplumber",
+    cache: Optional[TextCache] = None,
+    digest: Optional[str] = None,
+) -> Iterator[Tuple[int, List[TextBlock]]]:
+    """Like ``extract_cached`` but yields paragraph blocks with positions.
+
+    Blocks are cached as JSON next to the plain text entries, under their own key.
+    """
+    engine = resolve_engine(engine)
+    options = {"blocks": True}
+    if cache is not None and digest is None:
+        digest = file_digest(pdf)
+
+    extractor = None
+    try:
+        for idx in indexes:
+            key = TextCache.key(digest, idx, engine, options) if cache is not None else ""
+            raw = cache.get(key) if cache is not None else None
+            if raw is not None:
+                blocks = [
+                    TextBlock(b["text"], tuple(b["bbox"]) if b["bbox"] else None, b["size"])
+                    for b in json.loads(raw)
+                ]
+            else:
+                if extractor is None:
+                    extractor = open_extractor(pdf, engine)
+                blocks = extractor.extract_blocks(idx)
+                if cache is not None:
+                    cache.put(key, json.dumps([asdict(b) for b in blocks], ensure_ascii=False))
+            yield idx, blocks
+    finally:
+        if extractor is not None:
+            extractor.close()
+
+
+def cached_page_count(
+    pdf: Union[str, Path],
+    cache: Optional[TextCache] = None,
+    digest: Optional[str] = None,
+    engine: str = "auto",
+    layout: bool = False,
+) -> int:
+    """Page count of ``pdf``, remembered in ``cache`` alongside the page text.
+
+    On a miss the document is opened with the same ``engine`` the caller extracts
+    with, so no other backend is needed.
+    """
+    if cache is not None:
+        digest = digest or file_digest(pdf)
+        count = cache.get_page_count(digest)
+        if count is not None:
+            return count
+    with open_extractor(pdf, engine, layout) as extractor:
+        count = extractor.page_count
+    if cache is not None:
+        cache.put_page_count(digest, count)
+    return count
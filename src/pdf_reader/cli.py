@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import json
+import os
+import sys
+import time
+from collections import deque
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-import pdfplumber
 import typer
-from pypdf import PdfReader, PdfWriter
 from rich.console import Console
-from rich.table import Table
+
+from .cache import TextCache, cached_page_count, extract_blocks_cached, extract_cached, file_digest
+from .extractors import ENGINES, open_extractor, resolve_engine, text_blocks
+
+# Heavy backends (pypdf, pdfplumber, pymupdf, rich.table, process pools) are imported
+# inside the commands that need them so `--help` and light commands start fast.
+# Run bench_startup.py after touching imports here.
 
 app = typer.Typer(help="PDF reader/manager CLI")
 console = Console()
@@ -49,9 +58,114 @@ def parse_page_ranges(pages: Optional[str], total_pages: int) -> List[int]:
     return unique
 
 
+def _bounded_map(pool, fn, arg_tuples: Iterable[tuple], window: int) -> Iterator:
+    """Like ``pool.map`` but with at most ``window`` tasks in flight, results in order."""
+    pending: deque = deque()
+    for args in arg_tuples:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# The document an extract worker process has open, reused for every shard it is given:
+# ((path, engine, layout), extractor)
+_shard_extractor: Optional[tuple] = None
+
+
+def _extract_shard(
+    pdf_path: str,
+    indexes: List[int],
+    engine: str,
+    layout: bool,
+    cache: Optional[TextCache],
+    digest: Optional[str],
+) -> List[Tuple[int, str]]:
+    """Worker entry point: extract a shard of pages with this process's open PDF.
+
+    Opening is the expensive part with pdfplumber, so each worker opens the PDF
+    once, on its first shard that misses the cache, and keeps it for the rest.
+    """
+    global _shard_extractor
+    key = (pdf_path, engine, layout)
+    if _shard_extractor is not None and _shard_extractor[0] == key:
+        extractor = _shard_extractor[1]
+    elif cache is not None and all(
+        cache.get(TextCache.key(digest, idx, resolve_engine(engine, layout), {"layout": layout})) is not None
+        for idx in indexes
+    ):
+        extractor = None  # fully cached shard: no need to open the PDF at all
+    else:
+        if _shard_extractor is not None:
+            _shard_extractor[1].close()
+        extractor = open_extractor(pdf_path, engine, layout=layout)
+        _shard_extractor = (key, extractor)
+    return list(
+        extract_cached(pdf_path, indexes, engine, layout, cache=cache, digest=digest, extractor=extractor)
+    )
+
+
+def iter_page_texts(
+    pdf: Path,
+    indexes: List[int],
+    workers: int = 1,
+    chunk_size: int = 16,
+    engine: str = "pdfplumber",
+    layout: bool = False,
+    cache: Optional[TextCache] = None,
+) -> Iterator[Tuple[int, str]]:
+    """Yield ``(index, text)`` for ``indexes`` in order, as soon as each page is ready.
+
+    Pages are split into shards of ``chunk_size``; each worker opens the PDF on its
+    own, once, and reuses it for every shard it extracts. Only a bounded window of shards is in flight at once, so results are
+    never buffered for the whole document. Documents that fit in a single shard
+    are extracted in-process so they don't pay pool startup costs. Pages found in
+    ``cache`` are served without opening the PDF at all.
+    """
+    if chunk_size < 1:
+        raise typer.BadParameter("chunk size must be at least 1")
+    if workers < 1:
+        workers = os.cpu_count() or 1
+
+    digest = file_digest(pdf) if cache is not None else None
+    shards = [indexes[i : i + chunk_size] for i in range(0, len(indexes), chunk_size)]
+    if workers == 1 or len(shards) <= 1:
+        yield from extract_cached(pdf, indexes, engine, layout, cache=cache, digest=digest)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, len(shards))
+    args = ((str(pdf), shard, engine, layout, cache, digest) for shard in shards)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in _bounded_map(pool, _extract_shard, args, window=2 * workers):
+            yield from results
+
+
+def format_pages(
+    pages: Iterable[Tuple[int, str]],
+    separator: str = "\n\n",
+    marker: Optional[str] = None,
+) -> Iterator[str]:
+    """Render extracted pages as text fragments, optionally prefixed by a page marker.
+
+    ``marker`` is a format string such as ``"--- Page {page} ---"``; ``{page}`` is 1-based.
+    """
+    for position, (idx, text) in enumerate(pages):
+        if position:
+            yield separator
+        if marker:
+            yield marker.format(page=idx + 1) + "\n"
+        yield text
+
+
 @app.command()
 def info(pdf: Path) -> None:
     """Show metadata and basic stats for a PDF."""
+    from pypdf import PdfReader
+    from rich.table import Table
+
     reader = PdfReader(str(pdf))
     metadata = reader.metadata or {}
 
@@ -76,16 +190,59 @@ def extract_text(
     pdf: Path,
     pages: Optional[str] = typer.Option(None, help="Page ranges like '1,3-5'; default all"),
     output: Optional[Path] = typer.Option(None, help="Write extracted text to file"),
+    workers: int = typer.Option(1, help="Worker processes for extraction; 0 uses all CPUs"),
+    chunk_size: int = typer.Option(16, help="Pages per worker shard"),
+    stream: bool = typer.Option(False, help="Write each page as soon as it is extracted"),
+    page_marker: Optional[str] = typer.Option(
+        None, help="Header written before each page, e.g. '--- Page {page} ---'"
+    ),
+    engine: str = typer.Option(
+        "pdfplumber", help=f"Extraction engine: {', '.join(ENGINES)}"
+    ),
+    layout: bool = typer.Option(
+        False, help="Layout-aware extraction; with --engine auto this selects pdfplumber"
+    ),
+    use_cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse text from the persistent extraction cache"
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        None, help="Cache directory; default $PDFREADER_CACHE_DIR or ~/.cache/pdfreader"
+    ),
 ) -> None:
     """Extract text from selected pages."""
-    with pdfplumber.open(str(pdf)) as doc:
-        indexes = parse_page_ranges(pages, len(doc.pages))
-        texts = []
-        for idx in indexes:
-            text = doc.pages[idx].extract_text() or ""
-            texts.append(text)
-
-    combined = "\n\n".join(texts)
+    try:
+        resolve_engine(engine, layout)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    cache = TextCache(cache_dir) if use_cache else None
+    indexes = parse_page_ranges(pages, cached_page_count(pdf, cache, engine=engine, layout=layout))
+    fragments = format_pages(
+        iter_page_texts(
+            pdf,
+            indexes,
+            workers=workers,
+            chunk_size=chunk_size,
+            engine=engine,
+            layout=layout,
+            cache=cache,
+        ),
+        marker=page_marker,
+    )
+
+    if stream:
+        if output:
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with output.open("w", encoding="utf-8") as f:
+                f.writelines(fragments)
+            console.print(f"Wrote text to {output}")
+        else:
+            for fragment in fragments:
+                sys.stdout.write(fragment)
+                sys.stdout.flush()
+            sys.stdout.write("\n")
+        return
+
+    combined = "".join(fragments)
     if output:
         output.parent.mkdir(parents=True, exist_ok=True)
         output.write_text(combined, encoding="utf-8")
@@ -94,6 +251,399 @@ def extract_text(
         console.print(combined)
 
 
+def collect_pdfs(source: str) -> List[Tuple[Path, Path]]:
+    """Resolve a directory or glob pattern to ``(pdf, relative_path)`` pairs, sorted."""
+    import glob
+
+    root = Path(source)
+    if root.is_dir():
+        found = [p for p in root.rglob("*") if p.suffix.lower() == ".pdf" and p.is_file()]
+        return sorted((p, p.relative_to(root)) for p in found)
+
+    # For a glob, keep paths relative to the non-wildcard prefix so outputs don't collide
+    prefix = source
+    for i, ch in enumerate(source):
+        if ch in "*?[":
+            prefix = source[:i]
+            break
+    base = Path(prefix) if prefix.endswith(("/", os.sep)) else Path(prefix).parent
+    found = [Path(p) for p in glob.glob(source, recursive=True)]
+    pairs = []
+    for p in found:
+        if p.is_file() and p.suffix.lower() == ".pdf":
+            try:
+                rel = p.relative_to(base)
+            except ValueError:
+                rel = Path(p.name)
+            pairs.append((p, rel))
+    return sorted(pairs)
+
+
+def _batch_extract_one(
+    pdf_path: str,
+    out_path: str,
+    engine: str,
+    layout: bool,
+    cache: Optional[TextCache],
+) -> Dict[str, object]:
+    """Worker entry point for batch-extract: extract one document to ``out_path``."""
+    started = time.perf_counter()
+    record: Dict[str, object] = {"source": pdf_path, "output": out_path}
+    try:
+        digest = file_digest(pdf_path)
+        total = cached_page_count(pdf_path, cache, digest, engine, layout)
+        pages = extract_cached(pdf_path, range(total), engine, layout, cache=cache, digest=digest)
+        out = Path(out_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(out.name + ".part")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.writelines(format_pages(pages))
+        os.replace(tmp, out)
+        record.update(status="ok", pages=total, sha256=digest)
+    except Exception as exc:  # noqa: BLE001 - one bad file must not stop the batch
+        record.update(status="failed", pages=0, error=f"{type(exc).__name__}: {exc}")
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+@app.command("batch-extract")
+def batch_extract(
+    source: str = typer.Argument(..., help="Directory (searched recursively) or glob like 'specs/**/*.pdf'"),
+    out_dir: Path = typer.Option(..., help="Directory for .txt outputs and the manifest"),
+    workers: int = typer.Option(0, help="Worker processes; 0 uses all CPUs"),
+    engine: str = typer.Option("pdfplumber", help=f"Extraction engine: {', '.join(ENGINES)}"),
+    layout: bool = typer.Option(False, help="Layout-aware extraction"),
+    force: bool = typer.Option(False, help="Re-extract even if outputs are up to date"),
+    use_cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse text from the persistent extraction cache"
+    ),
+    cache_dir: Optional[Path] = typer.Option(None, help="Cache directory"),
+    manifest: Optional[Path] = typer.Option(
+        None, help="Summary manifest path; default <out-dir>/manifest.json"
+    ),
+) -> None:
+    """Extract text from many PDFs in one long-lived process pool."""
+    try:
+        resolve_engine(engine, layout)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+    pdfs = collect_pdfs(source)
+    if not pdfs:
+        console.print(f"No PDFs matched {source}")
+        raise typer.Exit(code=1)
+
+    manifest = manifest or out_dir / "manifest.json"
+    previous: Dict[str, dict] = {}
+    if manifest.exists():
+        try:
+            prior_run = json.loads(manifest.read_text("utf-8"))
+            # Outputs from a different engine/mode are never considered up to date
+            if (prior_run["engine"], prior_run["layout"]) == (engine, layout):
+                previous = {r["source"]: r for r in prior_run["files"]}
+        except (ValueError, KeyError, TypeError):
+            previous = {}
+
+    cache = TextCache(cache_dir) if use_cache else None
+    records: List[Dict[str, object]] = []
+    jobs: List[Tuple[str, str]] = []
+    for pdf, rel in pdfs:
+        out = out_dir / rel.with_suffix(".txt")
+        prior = previous.get(str(pdf), {})
+        if not force and out.exists() and prior.get("status") in ("ok", "skipped"):
+            # Up to date if the output is newer, or the content hash is unchanged
+            fresh = out.stat().st_mtime >= pdf.stat().st_mtime
+            if not fresh and prior.get("sha256") == file_digest(pdf):
+                os.utime(out)  # content unchanged; take the mtime fast path next run
+                fresh = True
+            if fresh:
+                records.append({**prior, "status": "skipped", "seconds": 0.0})
+                continue
+        jobs.append((str(pdf), str(out)))
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    from rich.progress import (
+        BarColumn,
+        MofNCompleteColumn,
+        Progress,
+        TextColumn,
+        TimeElapsedColumn,
+    )
+
+    if workers < 1:
+        workers = os.cpu_count() or 1
+    started = time.perf_counter()
+    progress = Progress(
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console,
+    )
+    with progress:
+        task = progress.add_task("Extracting", total=len(jobs))
+        if jobs:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                futures = [
+                    pool.submit(_batch_extract_one, pdf, out, engine, layout, cache)
+                    for pdf, out in jobs
+                ]
+                for future in as_completed(futures):
+                    record = future.result()
+                    records.append(record)
+                    if record["status"] == "failed":
+                        progress.console.print(f"[red]Failed[/red] {record['source']}: {record['error']}")
+                    progress.advance(task)
+
+    records.sort(key=lambda r: str(r["source"]))
+    failed = [r for r in records if r["status"] == "failed"]
+    summary = {
+        "source": source,
+        "engine": engine,
+        "layout": layout,
+        "files": records,
+        "total": len(records),
+        "extracted": sum(1 for r in records if r["status"] == "ok"),
+        "skipped": sum(1 for r in records if r["status"] == "skipped"),
+        "failed": len(failed),
+        "pages": sum(int(r.get("pages", 0)) for r in records if r["status"] != "failed"),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    manifest.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    console.print(
+        f"Extracted {summary['extracted']}, skipped {summary['skipped']}, "
+        f"failed {summary['failed']} in {summary['seconds']:.1f}s; manifest at {manifest}"
+    )
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _document_pages(
+    pdf_path: str, engine: str, layout: bool, cache: Optional[TextCache]
+) -> List[Tuple[int, str]]:
+    """Worker entry point for index: extract every page of one document."""
+    digest = file_digest(pdf_path)
+    total = cached_page_count(pdf_path, cache, digest, engine, layout)
+    return list(extract_cached(pdf_path, range(total), engine, layout, cache=cache, digest=digest))
+
+
+def _index_pages(
+    pdf_path: str, engine: str, cache: Optional[TextCache]
+) -> Optional[List[Tuple[int, str]]]:
+    """Worker entry point for index; None marks a document that could not be read."""
+    try:
+        return _document_pages(pdf_path, engine, False, cache)
+    except Exception:  # noqa: BLE001 - one bad file must not stop indexing
+        return None
+
+
+@app.command("index")
+def build_index(
+    source: str = typer.Argument(..., help="Directory (searched recursively) or glob of PDFs"),
+    index_dir: Path = typer.Option(..., help="Directory that holds the search index"),
+    workers: int = typer.Option(0, help="Worker processes for extraction; 0 uses all CPUs"),
+    engine: str = typer.Option("pdfplumber", help=f"Extraction engine: {', '.join(ENGINES)}"),
+    use_cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse text from the persistent extraction cache"
+    ),
+    cache_dir: Optional[Path] = typer.Option(None, help="Cache directory"),
+    merge_factor: int = typer.Option(8, help="Merge segments once there are more than this many"),
+    background_merge: bool = typer.Option(
+        True, help="Run segment merges in a detached process instead of inline"
+    ),
+) -> None:
+    """Build or incrementally update a full-text search index over a corpus of PDFs.
+
+    Only new or changed documents (by size, mtime and content hash) are extracted;
+    deleted documents are tombstoned.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    from .search import merge_segments, update_index
+
+    try:
+        resolve_engine(engine)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+    pdfs = [pdf for pdf, _ in collect_pdfs(source)]
+    if not pdfs:
+        console.print(f"No PDFs matched {source}")
+        raise typer.Exit(code=1)
+
+    cache = TextCache(cache_dir) if use_cache else None
+    if workers < 1:
+        workers = os.cpu_count() or 1
+
+    def extract(paths: List[Path]) -> Iterator[Tuple[Path, Optional[List[Tuple[int, str]]]]]:
+        if not paths:
+            return
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            args = ((str(p), engine, cache) for p in paths)
+            for pdf, pages in zip(paths, _bounded_map(pool, _index_pages, args, 2 * workers)):
+                if pages is None:
+                    console.print(f"[red]Skipped[/red] {pdf}: could not extract text")
+                yield pdf, pages
+
+    started = time.perf_counter()
+    try:
+        stats = update_index(index_dir, pdfs, extract, engine=engine)
+    except (ValueError, TimeoutError) as exc:
+        console.print(f"[red]Error:[/red] {exc}")
+        raise typer.Exit(code=1) from exc
+    console.print(
+        f"Indexed {stats['indexed']}, unchanged {stats['unchanged']}, "
+        f"removed {stats['removed']}, failed {stats['failed']} "
+        f"in {time.perf_counter() - started:.1f}s ({stats['segments']} segment(s))"
+    )
+
+    if stats["segments"] > merge_factor:
+        if background_merge:
+            import subprocess
+
+            # Detached so this command returns now; searches keep using the old segments.
+            # Its warnings and errors go to merge.log in the index directory.
+            with open(index_dir / "merge.log", "ab") as log:
+                subprocess.Popen(
+                    [sys.executable, "-m", "pdf_reader.cli", "index-merge", str(index_dir)],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=log,
+                    start_new_session=True,
+                )
+            console.print(f"Started background segment merge (log: {index_dir / 'merge.log'})")
+        else:
+            merged = merge_segments(index_dir)
+            console.print(f"Merged {merged} segment(s)")
+
+
+@app.command("index-merge")
+def index_merge(
+    index_dir: Path = typer.Argument(..., help="Directory created by 'pdfreader index'"),
+    max_segments: int = typer.Option(1, help="Merge until at most this many segments remain"),
+) -> None:
+    """Merge index segments and drop tombstoned documents."""
+    from .search import merge_segments
+
+    merged = merge_segments(index_dir, max_segments=max_segments)
+    console.print(f"Merged {merged} segment(s)")
+
+
+@app.command()
+def search(
+    index_dir: Path = typer.Argument(..., help="Directory created by 'pdfreader index'"),
+    query: str = typer.Argument(..., help='Terms, "phrases", AND/OR/NOT, -term, (groups)'),
+    limit: int = typer.Option(10, help="Maximum results"),
+    pages: Optional[str] = typer.Option(None, help="Only match these pages, e.g. '1,3-5'"),
+) -> None:
+    """Search an index built with 'pdfreader index'."""
+    from rich.table import Table
+
+    from .search import SearchIndex
+
+    started = time.perf_counter()
+    try:
+        index = SearchIndex(index_dir)
+    except FileNotFoundError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    allowed = set(parse_page_ranges(pages, index.max_pages)) if pages else None
+    hits = index.search(query, limit=limit, pages=allowed)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    table = Table(title=f"{query!r}: {len(hits)} result(s) in {elapsed_ms:.1f} ms", show_lines=True)
+    table.add_column("Score", justify="right")
+    table.add_column("File")
+    table.add_column("Page", justify="right")
+    table.add_column("Snippet")
+    for hit in hits:
+        table.add_row(f"{hit.score:.2f}", hit.path, str(hit.page + 1), hit.snippet)
+    console.print(table)
+
+
+@app.command()
+def ask(
+    target: Path = typer.Argument(..., help="A PDF, or a directory created by 'pdfreader index'"),
+    question: str = typer.Argument(..., help="Question to answer from the document text"),
+    top_k: int = typer.Option(5, help="Number of passages to return"),
+    pages: Optional[str] = typer.Option(None, help="Only use these pages of a PDF, e.g. '1,3-5'"),
+    engine: str = typer.Option("pdfplumber", help=f"Extraction engine: {', '.join(ENGINES)}"),
+    use_cache: bool = typer.Option(
+        True, "--cache/--no-cache", help="Reuse text from the persistent extraction cache"
+    ),
+    cache_dir: Optional[Path] = typer.Option(None, help="Cache directory"),
+    ann: Optional[bool] = typer.Option(
+        None,
+        "--ann/--exact",
+        help="Approximate (IVF-PQ) or exact search; default: approximate for large corpora",
+    ),
+    nprobe: int = typer.Option(8, help="Inverted lists to scan per query with --ann (higher: better recall)"),
+    chunker: str = typer.Option(
+        "layout", help="'layout': paragraphs and headings with positions; 'words': fixed word windows"
+    ),
+) -> None:
+    """Return the passages most relevant to a question, with page numbers."""
+    from rich.table import Table
+
+    try:
+        from .semantic import VECTORS_DIR, VectorStore, chunk_blocks, chunk_pages
+    except ImportError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    if chunker not in ("layout", "words"):
+        raise typer.BadParameter("--chunker must be 'layout' or 'words'")
+
+    started = time.perf_counter()
+    if target.is_dir():
+        from .search import SearchIndex
+
+        try:
+            index = SearchIndex(target)
+        except FileNotFoundError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        # Embeddings are persisted next to the index and rebuilt when it or the chunker changes
+        generation = f"{index.generation}:{chunker}"
+        store = VectorStore.load(target / VECTORS_DIR, generation=generation)
+        # An explicit --ann/--exact that doesn't match the saved store forces a rebuild
+        if store is None or (ann is not None and ann != (store.ann is not None)):
+            if chunker == "layout":
+                # The index keeps plain text only, so blocks come from paragraph breaks
+                chunks = chunk_blocks((path, page, text_blocks(text)) for path, page, text in index.iter_pages())
+            else:
+                chunks = chunk_pages(index.iter_pages())
+            store = VectorStore.build(chunks, ann=ann)
+            store.save(target / VECTORS_DIR, generation=generation)
+        index.close()
+    else:
+        try:
+            resolve_engine(engine)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc)) from exc
+        cache = TextCache(cache_dir) if use_cache else None
+        indexes = parse_page_ranges(pages, cached_page_count(target, cache, engine=engine))
+        # Chunks are produced (and embedded) page by page while extraction continues
+        if chunker == "layout":
+            blocks = extract_blocks_cached(target, indexes, engine, cache=cache)
+            chunks = chunk_blocks((str(target), idx, page_blocks) for idx, page_blocks in blocks)
+        else:
+            texts = extract_cached(target, indexes, engine, cache=cache)
+            chunks = chunk_pages((str(target), idx, text) for idx, text in texts)
+        store = VectorStore.build(chunks, ann=ann)
+
+    passages = store.query(question, top_k=top_k, nprobe=nprobe)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    table = Table(title=f"{question!r}: top {len(passages)} passage(s) in {elapsed_ms:.0f} ms", show_lines=True)
+    table.add_column("Score", justify="right")
+    table.add_column("File")
+    table.add_column("Page", justify="right")
+    table.add_column("Passage")
+    for passage in passages:
+        table.add_row(f"{passage.score:.3f}", passage.path, str(passage.page + 1), passage.text)
+    console.print(table)
+
+
 @app.command()
 def split(
     pdf: Path,
@@ -101,16 +651,10 @@ def split(
     output: Path = typer.Option(..., help="Output PDF path"),
 ) -> None:
     """Split selected pages into a new PDF."""
-    reader = PdfReader(str(pdf))
-    indexes = parse_page_ranges(pages, len(reader.pages))
-
-    writer = PdfWriter()
-    for idx in indexes:
-        writer.add_page(reader.pages[idx])
+    from .operations import split_pdf
 
-    output.parent.mkdir(parents=True, exist_ok=True)
-    with output.open("wb") as f:
-        writer.write(f)
+    indexes = parse_page_ranges(pages, cached_page_count(pdf, engine="pypdf"))
+    split_pdf(pdf, indexes, output)
     console.print(f"Wrote split PDF to {output}")
 
 
@@ -120,18 +664,73 @@ def merge(
     pdfs: List[Path] = typer.Argument(..., help="PDF files to merge"),
 ) -> None:
     """Merge multiple PDFs into one."""
-    writer = PdfWriter()
-    for pdf in pdfs:
-        reader = PdfReader(str(pdf))
-        for page in reader.pages:
-            writer.add_page(page)
-
-    output.parent.mkdir(parents=True, exist_ok=True)
-    with output.open("wb") as f:
-        writer.write(f)
+    from .operations import merge_pdfs
+
+    merge_pdfs(pdfs, output)
     console.print(f"Wrote merged PDF to {output}")
 
 
+@app.command("images2pdf")
+def images2pdf(
+    output: Path = typer.Argument(..., help="Output PDF path"),
+    images: List[Path] = typer.Argument(..., help="Image files, one page each, in order"),
+    workers: int = typer.Option(0, help="Threads decoding and resizing images; 0 uses all CPUs"),
+) -> None:
+    """Convert images to a PDF, every page scaled to the same A4-fitting size."""
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+    from .operations import images_to_pdf
+
+    progress = Progress(
+        TextColumn("[bold]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+        console=console,
+    )
+    with progress:
+        task = progress.add_task("Converting", total=len(images))
+        result = images_to_pdf(
+            images,
+            output,
+            progress=lambda done, total: progress.update(task, completed=done),
+            workers=workers or None,
+        )
+    console.print(f"Wrote {result.count} pages ({result.size[0]}x{result.size[1]} px) to {output}")
+
+
+cache_app = typer.Typer(help="Inspect or clear the persistent extraction cache")
+app.add_typer(cache_app, name="cache")
+
+
+@cache_app.command("stats")
+def cache_stats(
+    cache_dir: Optional[Path] = typer.Option(None, help="Cache directory"),
+) -> None:
+    """Show cache location, entry count, and size."""
+    from rich.table import Table
+
+    stats = TextCache(cache_dir).stats()
+
+    table = Table(title="Extraction cache", show_lines=True)
+    table.add_column("Field")
+    table.add_column("Value")
+    table.add_row("Directory", stats["root"])
+    table.add_row("Entries", str(stats["entries"]))
+    table.add_row("Size", f"{stats['bytes'] / (1024 * 1024):.1f} MB")
+    table.add_row("Limit", f"{stats['max_bytes'] / (1024 * 1024):.0f} MB")
+    console.print(table)
+
+
+@cache_app.command("clear")
+def cache_clear(
+    cache_dir: Optional[Path] = typer.Option(None, help="Cache directory"),
+) -> None:
+    """Delete every cached entry."""
+    removed = TextCache(cache_dir).clear()
+    console.print(f"Removed {removed} cached entries")
+
+
 def main() -> None:
     app()
 
@@ -0,0 +1,137 @@
+"""Long-lived handle on one open PDF for interactive viewers."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .cache import TextCache, bytes_digest, extract_cached, file_digest
+from .extractors import PymupdfExtractor
+
+
+class DocumentSession:
+    """Open a PDF once and reuse it for page rendering, text and metadata.
+
+    Viewers keep one session per file in their list and close it when the file
+    is removed, so flipping pages, zooming and resizing never re-parse the PDF.
+    Page text comes from the same MuPDF document and goes through ``cache``.
+
+    MuPDF documents must not be used from two threads at once; every call takes
+    the session lock so background render workers can share the session.
+
+    With ``data`` the PDF is opened from those bytes and ``path`` only names it
+    (for cache keys); nothing is read from disk.
+    """
+
+    engine = PymupdfExtractor.name
+
+    def __init__(
+        self, path: Union[str, Path], cache: Optional[TextCache] = None, data: Optional[bytes] = None
+    ):
+        import pymupdf
+
+        self.path = Path(path)
+        self.cache = cache
+        self._data = data
+        if data is None:
+            self._doc = pymupdf.open(str(self.path))
+        else:
+            self._doc = pymupdf.open(stream=data, filetype="pdf")
+        self._extractor = PymupdfExtractor.from_document(self._doc, self.path)
+        self._digest: Optional[str] = None
+        self._page_sizes: Optional[List[Tuple[float, float]]] = None
+        self._lock = threading.RLock()
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    @property
+    def closed(self) -> bool:
+        return self._doc.is_closed
+
+    @property
+    def is_encrypted(self) -> bool:
+        return bool(self._doc.is_encrypted)
+
+    @property
+    def metadata(self) -> Dict[str, str]:
+        """Non-empty document info entries (title, author, producer, ...)."""
+        with self._lock:
+            metadata = self._doc.metadata or {}
+        return {key: value for key, value in metadata.items() if value}
+
+    def page_size(self, index: int) -> Tuple[float, float]:
+        with self._lock:
+            rect = self._doc[index].rect
+        return rect.width, rect.height
+
+    def page_sizes(self) -> List[Tuple[float, float]]:
+        """``(width, height)`` in points of every page, for laying out placeholders."""
+        with self._lock:
+            if self._page_sizes is None:
+                self._page_sizes = [(page.rect.width, page.rect.height) for page in self._doc]
+            return list(self._page_sizes)
+
+    def render(self, index: int, scale: float, clip: Optional[Tuple[float, float, float, float]] = None):
+        """Rasterize page ``index`` at ``scale`` (1.0 = 72 dpi) to a ``pymupdf.Pixmap``.
+
+        ``clip`` limits the render to ``(x0, y0, x1, y1)`` in page points measured
+        from the page's top-left corner.
+        """
+        import pymupdf
+
+        with self._lock:
+            page = self._doc[index]
+            if clip is not None:
+                origin = page.rect.tl
+                clip = pymupdf.Rect(clip) + (origin.x, origin.y, origin.x, origin.y)
+            return page.get_pixmap(matrix=pymupdf.Matrix(scale, scale), clip=clip)
+
+    def text(self, index: int) -> str:
+        if self.cache is not None and self._digest is None:
+            self._digest = file_digest(self.path) if self._data is None else bytes_digest(self._data)
+        with self._lock:
+            _, text = next(extract_cached(
+                self.path,
+                [index],
+                self.engine,
+                cache=self.cache,
+                digest=self._digest,
+                extractor=self._extractor,
+            ))
+        return text
+
+    def close(self) -> None:
+        with self._lock:
+            self._doc.close()
+
+    def __enter__(self) -> "DocumentSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+# Sessions opened inside a render worker process, most recently used last
+_worker_sessions: "OrderedDict[str, DocumentSession]" = OrderedDict()
+_WORKER_MAX_DOCUMENTS = 4
+
+
+def render_samples(
+    path: str, index: int, scale: float, clip: Optional[Tuple[float, float, float, float]] = None
+) -> Tuple[int, int, int, int, bytes]:
+    """Render a page in a worker process; returns ``(width, height, stride, n, samples)``.
+
+    Runs in a ``RenderWorkers`` process. Each worker keeps its last few documents
+    open between calls.
+    """
+    session = _worker_sessions.pop(path, None)
+    if session is None:
+        session = DocumentSession(path)
+        while len(_worker_sessions) >= _WORKER_MAX_DOCUMENTS:
+            _worker_sessions.popitem(last=False)[1].close()
+    _worker_sessions[path] = session
+    pix = session.render(index, scale, clip=clip)
+    return pix.width, pix.height, pix.stride, pix.n, pix.samples
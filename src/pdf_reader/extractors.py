@@ -0,0 +1,225 @@
+"""Pluggable text extraction engines shared by the CLI, GUI, and web app."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# "auto" picks the fast engine unless layout-aware extraction is requested.
+ENGINES = ("auto", "pdfplumber", "pymupdf", "pypdf")
+FAST_ENGINE = "pymupdf"
+LAYOUT_ENGINE = "pdfplumber"
+
+BBox = Tuple[float, float, float, float]  # x0, top, x1, bottom in PDF points
+
+
+@dataclass
+class TextBlock:
+    """A paragraph-like run of text on one page."""
+
+    text: str
+    bbox: Optional[BBox] = None  # None when the engine has no positions
+    size: Optional[float] = None  # dominant font size, when known
+
+
+def text_blocks(text: str) -> List[TextBlock]:
+    """Split plain page text into blocks at blank lines (no positions)."""
+    return [TextBlock(part.strip()) for part in re.split(r"\n\s*\n", text) if part.strip()]
+
+
+class Extractor:
+    """Open a PDF once and extract page text with one backend.
+
+    Subclasses set ``name`` and implement ``page_count``, ``extract_page`` and
+    ``close``. Backends are imported on construction so callers only pay for the
+    library they actually use.
+    """
+
+    name = ""
+
+    def __init__(self, path: Union[str, Path], layout: bool = False):
+        self.path = Path(path)
+        self.layout = layout
+
+    @property
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    def extract_page(self, index: int) -> str:
+        """Return the text of the zero-based page ``index`` ("" when there is none)."""
+        raise NotImplementedError
+
+    def extract_blocks(self, index: int) -> List[TextBlock]:
+        """Return page ``index`` as paragraph blocks in reading order.
+
+        The default splits the plain text at blank lines; engines that know word
+        positions override this to add bounding boxes and font sizes.
+        """
+        return text_blocks(self.extract_page(index))
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def __enter__(self) -> "Extractor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class PdfplumberExtractor(Extractor):
+    """Layout-aware but slow extraction through pdfplumber/pdfminer."""
+
+    name = "pdfplumber"
+
+    def __init__(self, path: Union[str, Path], layout: bool = False):
+        super().__init__(path, layout)
+        import pdfplumber
+
+        self._doc = pdfplumber.open(str(self.path))
+
+    @property
+    def page_count(self) -> int:
+        return len(self._doc.pages)
+
+    def extract_page(self, index: int) -> str:
+        page = self._doc.pages[index]
+        text = page.extract_text(layout=self.layout) or ""
+        # Drop pdfplumber's cached layout objects so memory stays flat
+        page.close()
+        return text
+
+    def extract_blocks(self, index: int) -> List[TextBlock]:
+        page = self._doc.pages[index]
+        words = page.extract_words(extra_attrs=["size"])
+        page.close()
+
+        # Words -> lines (same baseline) -> paragraphs (small vertical gap, same size)
+        lines: List[List[dict]] = []
+        for word in words:
+            line = lines[-1] if lines else None
+            if line and abs(word["top"] - line[-1]["top"]) <= word["size"] * 0.5:
+                line.append(word)
+            else:
+                lines.append([word])
+
+        blocks: List[TextBlock] = []
+        previous = None
+        for line in lines:
+            size = max(w["size"] for w in line)
+            top = min(w["top"] for w in line)
+            bottom = max(w["bottom"] for w in line)
+            text = " ".join(w["text"] for w in line)
+            if (
+                previous is not None
+                and top - previous[1] <= previous[0] * 0.6
+                and abs(size - previous[0]) < 1.0
+            ):
+                block = blocks[-1]
+                x0, b_top, x1, _ = block.bbox
+                block.text += "\n" + text
+                block.bbox = (
+                    min(x0, min(w["x0"] for w in line)), b_top, max(x1, max(w["x1"] for w in line)), bottom
+                )
+            else:
+                bbox = (min(w["x0"] for w in line), top, max(w["x1"] for w in line), bottom)
+                blocks.append(TextBlock(text, bbox, size))
+            previous = (size, bottom)
+        return blocks
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+class PymupdfExtractor(Extractor):
+    """Fast extraction through MuPDF."""
+
+    name = "pymupdf"
+
+    def __init__(self, path: Union[str, Path], layout: bool = False):
+        super().__init__(path, layout)
+        import pymupdf
+
+        self._doc = pymupdf.open(str(self.path))
+
+    @classmethod
+    def from_document(cls, doc, path: Union[str, Path], layout: bool = False) -> "PymupdfExtractor":
+        """Wrap an already open ``pymupdf.Document``; the caller keeps ownership."""
+        extractor = cls.__new__(cls)
+        Extractor.__init__(extractor, path, layout)
+        extractor._doc = doc
+        return extractor
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
+
+    def extract_page(self, index: int) -> str:
+        # MuPDF terminates every block with a newline; strip to match the other engines
+        return self._doc[index].get_text("text", sort=self.layout).rstrip()
+
+    def extract_blocks(self, index: int) -> List[TextBlock]:
+        blocks: List[TextBlock] = []
+        for block in self._doc[index].get_text("dict", sort=True)["blocks"]:
+            if block["type"] != 0:  # image block
+                continue
+            spans = [span for line in block["lines"] for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            text = "\n".join("".join(span["text"] for span in line["spans"]) for line in block["lines"])
+            # The size covering the most characters is the block's dominant size
+            chars: Dict[float, int] = {}
+            for span in spans:
+                chars[span["size"]] = chars.get(span["size"], 0) + len(span["text"])
+            blocks.append(TextBlock(text.strip(), tuple(block["bbox"]), max(chars, key=chars.get)))
+        return blocks
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+class PypdfExtractor(Extractor):
+    """Pure-Python extraction through pypdf."""
+
+    name = "pypdf"
+
+    def __init__(self, path: Union[str, Path], layout: bool = False):
+        super().__init__(path, layout)
+        from pypdf import PdfReader
+
+        self._reader = PdfReader(str(self.path))
+
+    @property
+    def page_count(self) -> int:
+        return len(self._reader.pages)
+
+    def extract_page(self, index: int) -> str:
+        mode = "layout" if self.layout else "plain"
+        return self._reader.pages[index].extract_text(extraction_mode=mode) or ""
+
+    def close(self) -> None:
+        # PdfReader copies path inputs into memory, so there is no handle to release
+        self._reader = None
+
+
+_EXTRACTORS = {
+    cls.name: cls for cls in (PdfplumberExtractor, PymupdfExtractor, PypdfExtractor)
+}
+
+
+def resolve_engine(engine: str, layout: bool = False) -> str:
+    """Map an engine name (possibly ``"auto"``) to a concrete backend name."""
+    engine = engine.lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; choose from {', '.join(ENGINES)}")
+    if engine == "auto":
+        return LAYOUT_ENGINE if layout else FAST_ENGINE
+    return engine
+
+
+def open_extractor(
+    path: Union[str, Path], engine: str = "auto", layout: bool = False
+) -> Extractor:
+    """Open ``path`` with the extractor selected by ``engine``."""
+    return _EXTRACTORS[resolve_engine(engine, layout)](path, layout=layout)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import Optional
+import multiprocessing
 import sys
 
 # Ensure the script can find modules regardless of where it's run from
@@ -15,7 +16,7 @@ for _path in [str(_current_dir), str(_src_dir), str(_project_root)]:
     if _path not in sys.path:
         sys.path.insert(0, _path)
 
-from PyQt5.QtCore import Qt, QSize, QRect
+from PyQt5.QtCore import Qt, QSize, QRect, QRectF, QSettings, QTimer
 from PyQt5.QtGui import QPixmap, QImage, QCursor, QIcon
 from PyQt5.QtWidgets import (
     QApplication,
@@ -37,25 +38,110 @@ from PyQt5.QtWidgets import (
     QScrollArea,
     QMenuBar,
     QMenu,
+    QProgressBar,
+    QStyle,
 )
-import pymupdf
-from pypdf import PdfReader, PdfWriter
 from PIL import Image
-import pdfplumber
-import io
 
 # When executed from a PyInstaller onefile/onedir build, __package__ can be
 # None, so fall back to absolute import paths.
 try:
+    from .cache import TextCache
     from .cli import parse_page_ranges
+    from .document import DocumentSession
+    from .extractors import ENGINES
+    from .jobs import Job, JobCancelled, JobRunner
+    from .operations import (
+        REDUCING_GAP,
+        ImageConversion,
+        export_text,
+        images_to_pdf,
+        merge_pdfs,
+        split_pdf,
+    )
+    from .render import (
+        DEFAULT_RENDER_CACHE_MB,
+        MIN_RENDER_CACHE_MB,
+        TILE_SIZE,
+        TILED_MIN_PIXELS,
+        PageTextLoader,
+        RenderCache,
+        ProgressiveRenderer,
+        RenderPrefetcher,
+        RenderScheduler,
+        RenderWorkers,
+        TiledPage,
+        qimage_from_pil,
+        render_key,
+    )
+    from .views import ContinuousView, ThumbnailStrip
 except Exception:  # noqa: BLE001 - broad on purpose for packaging edge cases
     current_dir = Path(__file__).resolve().parent
     sys.path.insert(0, str(current_dir))
     sys.path.insert(0, str(current_dir.parent))
     try:
+        from cache import TextCache
         from cli import parse_page_ranges
+        from document import DocumentSession
+        from extractors import ENGINES
+        from jobs import Job, JobCancelled, JobRunner
+        from operations import (
+            REDUCING_GAP,
+            ImageConversion,
+            export_text,
+            images_to_pdf,
+            merge_pdfs,
+            split_pdf,
+        )
+        from render import (
+            DEFAULT_RENDER_CACHE_MB,
+            MIN_RENDER_CACHE_MB,
+            TILE_SIZE,
+            TILED_MIN_PIXELS,
+            PageTextLoader,
+            RenderCache,
+            ProgressiveRenderer,
+            RenderPrefetcher,
+            RenderScheduler,
+            RenderWorkers,
+            TiledPage,
+            qimage_from_pil,
+            render_key,
+        )
+        from views import ContinuousView, ThumbnailStrip
     except ImportError:
+        from pdf_reader.cache import TextCache
         from pdf_reader.cli import parse_page_ranges
+        from pdf_reader.document import DocumentSession
+        from pdf_reader.extractors import ENGINES
+        from pdf_reader.jobs import Job, JobCancelled, JobRunner
+        from pdf_reader.operations import (
+            REDUCING_GAP,
+            ImageConversion,
+            export_text,
+            images_to_pdf,
+            merge_pdfs,
+            split_pdf,
+        )
+        from pdf_reader.render import (
+            DEFAULT_RENDER_CACHE_MB,
+            MIN_RENDER_CACHE_MB,
+            TILE_SIZE,
+            TILED_MIN_PIXELS,
+            PageTextLoader,
+            RenderCache,
+            ProgressiveRenderer,
+            RenderPrefetcher,
+            RenderScheduler,
+            RenderWorkers,
+            TiledPage,
+            qimage_from_pil,
+            render_key,
+        )
+        from pdf_reader.views import ContinuousView, ThumbnailStrip
+
+# Fit-mode re-renders wait until the window has stopped resizing for this long
+RESIZE_DEBOUNCE_MS = 150
 
 
 class CustomSplitter(QSplitter):
@@ -193,6 +279,39 @@ class PDFReaderGUI(QMainWindow):
         self.current_pixmap: Optional[QPixmap] = None
         self.current_pdf_size: Optional[tuple] = None
         self.left_panel_collapsed = False
+        self.text_cache = TextCache()
+        # One open document per PDF in the file list, closed when it leaves the list
+        self.sessions: dict[Path, DocumentSession] = {}
+        self.settings = QSettings("pdfreader", "PDFReader")
+        cache_mb = max(
+            int(self.settings.value("render_cache_mb", DEFAULT_RENDER_CACHE_MB)), MIN_RENDER_CACHE_MB
+        )
+        self.render_cache = RenderCache(cache_mb * 1024 * 1024)
+        # Worker processes shared by the single-page view and the multi-page views
+        self.render_workers = RenderWorkers()
+        # Continuous scrolling and thumbnails only render pages near their viewports
+        self.render_scheduler = RenderScheduler(self.render_cache, self.render_workers, parent=self)
+        # Uncached pages: low-res preview first, sharp render from a worker process
+        self.progressive = ProgressiveRenderer(self.render_scheduler, parent=self)
+        self.progressive.sharp_ready.connect(self._on_sharp_render)
+        self._pending_render: Optional[tuple] = None
+        # Renders the pages around the current one while the user reads, with spare workers
+        self.prefetcher = RenderPrefetcher(self.render_scheduler)
+        # Split, merge, export and conversion run in the background, one after another
+        self.job_runner = JobRunner(self)
+        self.job_runner.started.connect(self._on_job_started)
+        self.job_runner.progress.connect(self._on_job_progress)
+        self.job_runner.finished.connect(self._on_job_finished)
+        self.continuous_scroll = self.settings.value("continuous_scroll", False, type=bool)
+        self.show_thumbnails = self.settings.value("show_thumbnails", False, type=bool)
+        # Page text for the text panel is extracted off the GUI thread
+        self.text_loader = PageTextLoader(parent=self)
+        self.text_loader.text_ready.connect(self._on_page_text)
+        # Coalesces the stream of resize events from a window drag into one render
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self._resize_timer.timeout.connect(self._finish_resize)
         
         self.create_menubar()
         self.init_ui()
@@ -217,6 +336,7 @@ class PDFReaderGUI(QMainWindow):
         file_menu = menubar.addMenu("📁 File")
         file_menu.addAction("Open PDF", self.open_file)
         file_menu.addAction("Open Images", self.open_images)
+        file_menu.addAction("Remove Selected", self.remove_selected_file)
         file_menu.addAction("Clear List", self.clear_list)
         file_menu.addSeparator()
         file_menu.addAction("Exit", self.close)
@@ -232,8 +352,19 @@ class PDFReaderGUI(QMainWindow):
         view_menu.addAction("Zoom Out (Ctrl+-)", self.zoom_out)
         view_menu.addAction("Fit to Window (Ctrl+0)", self.zoom_fit)
         view_menu.addSeparator()
+        continuous_action = view_menu.addAction("Continuous Scroll")
+        continuous_action.setCheckable(True)
+        continuous_action.setChecked(self.continuous_scroll)
+        continuous_action.toggled.connect(self.set_continuous_scroll)
+        thumbnails_action = view_menu.addAction("Thumbnails")
+        thumbnails_action.setCheckable(True)
+        thumbnails_action.setChecked(self.show_thumbnails)
+        thumbnails_action.toggled.connect(self.set_show_thumbnails)
+        view_menu.addSeparator()
         view_menu.addAction("First Page (Home)", self.first_page)
         view_menu.addAction("Last Page (End)", self.last_page)
+        view_menu.addSeparator()
+        view_menu.addAction("Render Cache Size...", self.set_render_cache_size)
         
         # Operations menu
         ops_menu = menubar.addMenu("🛠️ Operations")
@@ -242,6 +373,8 @@ class PDFReaderGUI(QMainWindow):
         ops_menu.addAction("Merge PDFs", self.merge_files)
         ops_menu.addSeparator()
         ops_menu.addAction("Images to PDF", self.images_to_pdf)
+        ops_menu.addSeparator()
+        ops_menu.addAction("Cancel All Jobs", self.job_runner.cancel_all)
         
         # Help menu
         help_menu = menubar.addMenu("❓ Help")
@@ -332,6 +465,59 @@ class PDFReaderGUI(QMainWindow):
             def __init__(self, parent):
                 super().__init__(parent)
                 self.gui = parent
+                self.tiled_page: Optional[TiledPage] = None
+            
+            def set_tiled_page(self, tiled_page: Optional[TiledPage]):
+                """Draw ``tiled_page`` tile by tile instead of a pixmap (None to stop)."""
+                self.tiled_page = tiled_page
+                if tiled_page is None:
+                    self.gui.render_scheduler.cancel(TiledPage.client)
+                    self.setMinimumSize(0, 0)
+                else:
+                    self.clear()
+                    # The label takes the full page size (plus its border) so the scroll area scrolls over it
+                    frame = self.size() - self.contentsRect().size()
+                    self.setMinimumSize(tiled_page.width + frame.width(), tiled_page.height + frame.height())
+                self.update()
+            
+            def paintEvent(self, event):
+                if self.tiled_page is None:
+                    super().paintEvent(event)
+                    return
+                from PyQt5.QtGui import QPainter
+                
+                page = self.tiled_page
+                # Place the page where QLabel would place a pixmap of the same size
+                target = QStyle.alignedRect(
+                    self.layoutDirection(), self.alignment(), QSize(page.width, page.height), self.contentsRect()
+                )
+                painter = QPainter(self)
+                # Tiles come from the cache; missing ones show the stretched preview until rendered
+                preview = None
+                for x, y, image in page.tiles(event.rect().translated(-target.topLeft())):
+                    if image is not None:
+                        painter.drawImage(target.left() + x, target.top() + y, image)
+                        continue
+                    if preview is None:
+                        preview = page.preview()
+                    tile = QRectF(x, y, TILE_SIZE, TILE_SIZE).intersected(QRectF(0, 0, page.width, page.height))
+                    ratio = preview.width() / page.width
+                    source = QRectF(tile.x() * ratio, tile.y() * ratio, tile.width() * ratio, tile.height() * ratio)
+                    painter.drawImage(tile.translated(target.left(), target.top()), preview, source)
+                painter.end()
+                # Queue every missing tile in view, not just the exposed strip, nearest the middle first
+                visible = self.visibleRegion().boundingRect().translated(-target.topLeft())
+                self.gui.render_scheduler.request(TiledPage.client, page.jobs(visible))
+            
+            def on_tile_rendered(self, key, image):
+                """Repaint a tile of the current page once the scheduler has rendered it."""
+                page = self.tiled_page
+                if page is None or not page.owns(key):
+                    return
+                target = QStyle.alignedRect(
+                    self.layoutDirection(), self.alignment(), QSize(page.width, page.height), self.contentsRect()
+                )
+                self.update(page.tile_rect(key[3], key[4]).translated(target.topLeft()))
             
             def enterEvent(self, event):
                 self.setCursor(QCursor(Qt.OpenHandCursor))
@@ -342,6 +528,7 @@ class PDFReaderGUI(QMainWindow):
                 self.gui.on_pdf_preview_leave()
         
         self.page_image_label = PDFLabel(self)
+        self.render_scheduler.rendered.connect(self.page_image_label.on_tile_rendered)
         self.page_image_label.setStyleSheet("border: 1px solid #ccc; background-color: #f5f5f5;")
         # 不设置 setAlignment，改为让标签根据图像大小自动调整
         self.page_image_label.setScaledContents(False)  # 不自动缩放，保持原始大小
@@ -387,7 +574,19 @@ class PDFReaderGUI(QMainWindow):
                 background-color: #666;
             }
         """)
-        upper_layout.addWidget(scroll_upper, 1)
+        
+        # 缩略图栏与连续滚动视图（按需显示）
+        self.thumbnail_strip = ThumbnailStrip(self.render_scheduler, self.render_cache)
+        self.thumbnail_strip.page_clicked.connect(lambda index: self.page_spin.setValue(index + 1))
+        self.thumbnail_strip.hide()
+        self.continuous_view = ContinuousView(self.render_scheduler, self.render_cache)
+        self.continuous_view.page_changed.connect(self._on_view_page_changed)
+        self.continuous_view.hide()
+        self.pages_layout = QHBoxLayout()
+        self.pages_layout.addWidget(self.thumbnail_strip)
+        self.pages_layout.addWidget(scroll_upper, 1)
+        self.pages_layout.addWidget(self.continuous_view, 1)
+        upper_layout.addLayout(self.pages_layout, 1)
         
         upper_widget = QWidget()
         upper_widget.setLayout(upper_layout)
@@ -492,6 +691,16 @@ class PDFReaderGUI(QMainWindow):
         
         main_layout.addWidget(self.splitter)
         
+        # 状态栏：后台任务进度与取消
+        self.job_label = QLabel()
+        self.job_progress = QProgressBar()
+        self.job_progress.setMaximumWidth(200)
+        self.job_cancel_btn = QPushButton("Cancel")
+        self.job_cancel_btn.clicked.connect(self.cancel_current_job)
+        for widget in (self.job_label, self.job_progress, self.job_cancel_btn):
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+        
         # Store references for panel management
         self.left_panel_widget = left_panel
         self.center_panel_widget = center_panel
@@ -551,8 +760,51 @@ class PDFReaderGUI(QMainWindow):
             self.splitter.setSizes(new_sizes)
             self.left_panel_collapsed = True
 
+    def _session(self, path: Path) -> DocumentSession:
+        """Return the open session for ``path``, opening the file on first use."""
+        session = self.sessions.get(path)
+        if session is None:
+            session = self.sessions[path] = DocumentSession(path, cache=self.text_cache)
+        return session
+
+    def _close_session(self, path: Path):
+        self._cancel_renders()
+        session = self.sessions.pop(path, None)
+        tiled_page = self.page_image_label.tiled_page
+        if tiled_page is not None and tiled_page.session is session:
+            self.page_image_label.set_tiled_page(None)
+        for view in (self.continuous_view, self.thumbnail_strip):
+            if session is not None and view.session is session:
+                view.set_session(None)
+        if session is not None:
+            session.close()
+        self.render_workers.forget(path)
+        self.render_cache.drop(path)
+        self.text_loader.drop(path)
+
+    def remove_selected_file(self):
+        """Remove the selected file from the list and release its document."""
+        item = self.file_list.currentItem()
+        if item is None:
+            return
+        path = Path(item.data(Qt.UserRole))
+        self.file_list.takeItem(self.file_list.row(item))
+        if path in self.opened_pdfs:
+            self.opened_pdfs.remove(path)
+        self._close_session(path)
+        if path == self.current_pdf:
+            self.current_pdf = None
+            self.current_page = 0
+            self.total_pages = 0
+            self.info_display.clear()
+            self.preview_text.clear()
+            self.page_image_label.clear()
+            self.page_label.setText("0/0")
+
     def clear_list(self):
         """Clear file list."""
+        for path in list(self.sessions):
+            self._close_session(path)
         self.file_list.clear()
         self.opened_pdfs.clear()
         self.current_pdf = None
@@ -581,8 +833,7 @@ class PDFReaderGUI(QMainWindow):
         else:
             # Handle PDF file
             try:
-                reader = PdfReader(str(file_path))
-                self.total_pages = len(reader.pages)
+                self.total_pages = self._session(file_path).page_count
                 self.page_spin.setMaximum(self.total_pages)
                 self.page_spin.setValue(1)
                 self.show_info()
@@ -594,22 +845,19 @@ class PDFReaderGUI(QMainWindow):
         """Preview image file."""
         if not self.current_pdf or not self.current_pdf.exists():
             return
+        self.page_image_label.set_tiled_page(None)
+        self._cancel_renders()
+        self._sync_page_views(None)
+        self.current_pixmap = None
         try:
             img = Image.open(str(self.current_pdf))
             
-            # Convert RGBA to RGB if needed
-            if img.mode in ('RGBA', 'LA'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1])
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
             # Get preview area dimensions
             max_width = self.scroll_area.width() - 40
             max_height = self.scroll_area.height() - 40
             
-            # Scale if needed
+            # Scale if needed (the header alone gives the size, nothing is decoded yet)
+            target = None
             if max_width > 0 and max_height > 0:
                 img_ratio = img.width / img.height
                 max_ratio = max_width / max_height
@@ -622,14 +870,23 @@ class PDFReaderGUI(QMainWindow):
                 
                 if new_width < img.width:
                     new_height = int(new_width / img_ratio)
-                    img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                    target = (new_width, new_height)
+                    # JPEGs decode straight at 1/2, 1/4 or 1/8 scale when that still covers the target
+                    img.draft(None, target)
+            
+            # Convert RGBA to RGB if needed
+            if img.mode in ('RGBA', 'LA'):
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1])
+                img = background
+            elif img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            if target is not None and img.size != target:
+                img = img.resize(target, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
             
-            # Convert PIL Image to QPixmap using PPM format
-            img_byte_arr = io.BytesIO()
-            img.save(img_byte_arr, format='PPM')
-            img_byte_arr.seek(0)
-            pixmap = QPixmap()
-            pixmap.loadFromData(img_byte_arr.read())
+            # Hand the raw pixels to Qt directly (no PPM encode/decode)
+            pixmap = QPixmap.fromImage(qimage_from_pil(img))
             
             self.page_image_label.setPixmap(pixmap)
             self.preview_text.setPlainText(f"Image: {self.current_pdf.name}\nSize: {pixmap.width()}x{pixmap.height()}px")
@@ -643,13 +900,19 @@ class PDFReaderGUI(QMainWindow):
             return
         
         try:
-            doc = pymupdf.open(str(self.current_pdf))
-            page = doc[self.current_page]
+            session = self._session(self.current_pdf)
+            self._sync_page_views(session)
+            if self.continuous_scroll:
+                # The continuous view renders the pages around its viewport itself
+                self._cancel_renders()
+                self.continuous_view.set_zoom(None if self.fit_to_window else 2.0 * self.zoom_level)
+                if self.continuous_view.current_page() != self.current_page:
+                    self.continuous_view.scroll_to_page(self.current_page)
+                self._request_page_text(session)
+                self.page_label.setText(f"{self.current_page + 1}/{self.total_pages}")
+                return
             
-            # Get page rectangle (correct API)
-            rect = page.rect
-            page_width = rect.width
-            page_height = rect.height
+            page_width, page_height = session.page_size(self.current_page)
             self.current_pdf_size = (page_width, page_height)
             
             if self.fit_to_window:
@@ -665,38 +928,110 @@ class PDFReaderGUI(QMainWindow):
                     self.zoom_level = max(fit_zoom, 0.1)
             
             dpi_scale = 2.0 * self.zoom_level
-            mat = pymupdf.Matrix(dpi_scale, dpi_scale)
-            pix = page.get_pixmap(matrix=mat)
-            img_data = pix.tobytes("ppm")
-            
-            img = QImage()
-            img.loadFromData(img_data)
-            self.current_pixmap = QPixmap.fromImage(img)
-            
-            # 无论什么模式，都直接显示 pixmap，让滚动条根据内容大小自动出现
-            if self.fit_to_window:
-                # fit 模式：根据窗口宽度缩放
-                target_width = self.scroll_area.width() - 20
-                if target_width > 0 and self.current_pixmap.width() != target_width:
-                    scaled_pixmap = self.current_pixmap.scaledToWidth(target_width, Qt.SmoothTransformation)
-                    self.page_image_label.setPixmap(scaled_pixmap)
-                else:
-                    self.page_image_label.setPixmap(self.current_pixmap)
+            if not self.fit_to_window and page_width * page_height * dpi_scale ** 2 > TILED_MIN_PIXELS:
+                # High zoom: draw only the tiles the viewport shows, as it scrolls
+                self._cancel_renders()
+                self.current_pixmap = None
+                self.page_image_label.set_tiled_page(
+                    TiledPage(session, self.current_page, dpi_scale, self.render_cache)
+                )
+                self._request_page_text(session)
+                self.page_label.setText(f"{self.current_page + 1}/{self.total_pages}")
+                return
+            self.page_image_label.set_tiled_page(None)
+            self.prefetcher.cancel()
+            img = self.render_cache.get(render_key(self.current_pdf, self.current_page, dpi_scale))
+            if img is not None:
+                self.progressive.cancel()
+                self._pending_render = None
+                self._show_page_image(img)
+                self.prefetcher.schedule(session, self.current_page, dpi_scale)
             else:
-                # 非 fit 模式：显示原始 pixmap，根据大小自动显示滚动栏
-                self.page_image_label.setPixmap(self.current_pixmap)
-            
-            doc.close()
+                # Not rendered yet: show a quick low-res pass now, the sharp one when it arrives
+                ticket, preview = self.progressive.request(session, self.current_page, dpi_scale)
+                self._pending_render = (ticket, dpi_scale)
+                self._show_page_image(preview, (int(page_width * dpi_scale), int(page_height * dpi_scale)))
             
-            with pdfplumber.open(str(self.current_pdf)) as pdoc:
-                text = pdoc.pages[self.current_page].extract_text() or "[No text found]"
-                self.preview_text.setPlainText(text)
+            self._request_page_text(session)
             
             self.page_label.setText(f"{self.current_page + 1}/{self.total_pages}")
         except Exception as e:
             self.preview_text.setPlainText(f"Error: {e}")
             self.page_image_label.setText(f"Error: {str(e)[:50]}")
 
+    def _show_page_image(self, img: QImage, size: Optional[tuple] = None):
+        """Display a rendered page, stretched to ``size`` (pixels) if it is a preview pass."""
+        self.current_pixmap = QPixmap.fromImage(img)
+        if size and self.current_pixmap.width() != size[0]:
+            self.current_pixmap = self.current_pixmap.scaled(
+                size[0], size[1], Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+            )
+        
+        # 无论什么模式，都直接显示 pixmap，让滚动条根据内容大小自动出现
+        if self.fit_to_window:
+            # fit 模式：根据窗口宽度缩放
+            target_width = self.scroll_area.width() - 20
+            if target_width > 0 and self.current_pixmap.width() != target_width:
+                scaled_pixmap = self.current_pixmap.scaledToWidth(target_width, Qt.SmoothTransformation)
+                self.page_image_label.setPixmap(scaled_pixmap)
+            else:
+                self.page_image_label.setPixmap(self.current_pixmap)
+        else:
+            # 非 fit 模式：显示原始 pixmap，根据大小自动显示滚动栏
+            self.page_image_label.setPixmap(self.current_pixmap)
+
+    def _on_sharp_render(self, ticket: int, img: QImage):
+        """Swap the full-resolution render in for the preview, unless the user moved on."""
+        if self._pending_render is None or self._pending_render[0] != ticket:
+            return
+        _, dpi_scale = self._pending_render
+        self._pending_render = None
+        self._show_page_image(img)
+        self.prefetcher.schedule(self._session(self.current_pdf), self.current_page, dpi_scale)
+
+    def _sync_page_views(self, session: Optional[DocumentSession]):
+        """Show the thumbnail strip and continuous view as configured, on ``session``."""
+        continuous = self.continuous_scroll and session is not None
+        thumbnails = self.show_thumbnails and session is not None
+        self.scroll_area.setVisible(not continuous)
+        self.continuous_view.setVisible(continuous)
+        self.thumbnail_strip.setVisible(thumbnails)
+        # Lay out now so fit-to-window sizes below see the new widths
+        self.pages_layout.activate()
+        self.continuous_view.set_session(session if continuous else None)
+        self.thumbnail_strip.set_session(session if thumbnails else None)
+        self.thumbnail_strip.set_current(self.current_page)
+
+    def _on_view_page_changed(self, index: int):
+        """Follow the page the user scrolled to in the continuous view."""
+        self.current_page = index
+        self.page_spin.blockSignals(True)
+        self.page_spin.setValue(index + 1)
+        self.page_spin.blockSignals(False)
+        self.page_label.setText(f"{index + 1}/{self.total_pages}")
+        self.thumbnail_strip.set_current(index)
+        self._request_page_text(self.continuous_view.session)
+
+    def _request_page_text(self, session: DocumentSession):
+        """Fill the text panel from the cache, or clear it until the text is extracted."""
+        _, text = self.text_loader.request(session, self.current_page)
+        if text is None:
+            self.preview_text.clear()
+        else:
+            self.preview_text.setPlainText(text or "[No text found]")
+
+    def _on_page_text(self, ticket: int, text: str):
+        # Queued from the worker; a newer request may have been made since
+        if ticket == self.text_loader.ticket:
+            self.preview_text.setPlainText(text or "[No text found]")
+
+    def _cancel_renders(self):
+        """Drop queued prefetches, any sharp render and page text still on their way."""
+        self.prefetcher.cancel()
+        self.progressive.cancel()
+        self.text_loader.cancel()
+        self._pending_render = None
+
     def show_info(self):
         """Show PDF info."""
         if not self.current_pdf:
@@ -704,17 +1039,17 @@ class PDFReaderGUI(QMainWindow):
             return
         
         try:
-            reader = PdfReader(str(self.current_pdf))
-            metadata = reader.metadata or {}
+            session = self._session(self.current_pdf)
+            metadata = session.metadata
             
             info_text = f"📄 {self.current_pdf.name}\n\n"
-            info_text += f"Pages: {len(reader.pages)}\n"
-            info_text += f"Encrypted: {reader.is_encrypted}\n"
+            info_text += f"Pages: {session.page_count}\n"
+            info_text += f"Encrypted: {session.is_encrypted}\n"
             
             if metadata:
                 info_text += "\nMetadata:\n"
                 for key, value in metadata.items():
-                    info_text += f"  {key.lstrip('/')}: {value}\n"
+                    info_text += f"  {key}: {value}\n"
             
             self.info_display.setPlainText(info_text)
         except Exception as e:
@@ -736,31 +1071,44 @@ class PDFReaderGUI(QMainWindow):
         if not ok:
             return
         
+        engine, ok = QInputDialog.getItem(
+            self,
+            "Extract Text",
+            "Extraction engine (auto = fast PyMuPDF):",
+            list(ENGINES),
+            ENGINES.index("pdfplumber"),
+            False,
+        )
+        if not ok:
+            return
+        
         output_path, _ = QFileDialog.getSaveFileName(
             self, "Save Text", str(self.current_pdf.stem) + ".txt", "Text Files (*.txt)"
         )
         if not output_path:
             return
         
+        pdf = self.current_pdf
         try:
-            with pdfplumber.open(str(self.current_pdf)) as doc:
-                total_pages = len(doc.pages)
-                indexes = parse_page_ranges(pages_str or None, total_pages)
-                texts = []
-                for idx in indexes:
-                    text = doc.pages[idx].extract_text() or ""
-                    texts.append(text)
-                
-                combined = "\n\n".join(texts)
-                Path(output_path).write_text(combined, encoding="utf-8")
-                
-                preview = combined[:5000]
-                if len(combined) > 5000:
-                    preview += "\n\n[Truncated... Full text saved to file]"
-                self.text_display.setPlainText(preview)
-                QMessageBox.information(self, "Success", f"Text saved to {output_path}")
+            indexes = parse_page_ranges(pages_str or None, self.total_pages)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Extract failed: {e}")
+            return
+        
+        def done(combined: str):
+            preview = combined[:5000]
+            if len(combined) > 5000:
+                preview += "\n\n[Truncated... Full text saved to file]"
+            self.text_display.setPlainText(preview)
+            QMessageBox.information(self, "Success", f"Text saved to {output_path}")
+        
+        self._submit_job(
+            f"Extract text from {pdf.name}",
+            lambda progress: export_text(
+                pdf, indexes, Path(output_path), engine, cache=self.text_cache, progress=progress
+            ),
+            done,
+        )
 
     def split_pages(self):
         """Split PDF pages."""
@@ -780,19 +1128,17 @@ class PDFReaderGUI(QMainWindow):
         if not output_path:
             return
         
+        pdf = self.current_pdf
         try:
-            reader = PdfReader(str(self.current_pdf))
-            indexes = parse_page_ranges(pages_str, len(reader.pages))
-            writer = PdfWriter()
-            for idx in indexes:
-                writer.add_page(reader.pages[idx])
-            
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "wb") as f:
-                writer.write(f)
-            QMessageBox.information(self, "Success", f"Split PDF saved to {output_path}")
+            indexes = parse_page_ranges(pages_str, self.total_pages)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Split failed: {e}")
+            return
+        self._submit_job(
+            f"Split {pdf.name}",
+            lambda progress: split_pdf(pdf, indexes, Path(output_path), progress),
+            lambda _: QMessageBox.information(self, "Success", f"Split PDF saved to {output_path}"),
+        )
 
     def merge_files(self):
         """Merge PDFs."""
@@ -806,19 +1152,12 @@ class PDFReaderGUI(QMainWindow):
         if not output_path:
             return
         
-        try:
-            writer = PdfWriter()
-            for pdf_path in self.opened_pdfs:
-                reader = PdfReader(str(pdf_path))
-                for page in reader.pages:
-                    writer.add_page(page)
-            
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "wb") as f:
-                writer.write(f)
-            QMessageBox.information(self, "Success", f"Merged PDF saved to {output_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Merge failed: {e}")
+        pdfs = list(self.opened_pdfs)
+        self._submit_job(
+            f"Merge {len(pdfs)} PDFs",
+            lambda progress: merge_pdfs(pdfs, Path(output_path), progress),
+            lambda _: QMessageBox.information(self, "Success", f"Merged PDF saved to {output_path}"),
+        )
 
     def images_to_pdf(self):
         """Convert selected images to PDF with consistent scaling."""
@@ -835,76 +1174,63 @@ class PDFReaderGUI(QMainWindow):
         if not output_path:
             return
         
-        try:
-            # First pass: convert images and collect dimensions
-            images = []
-            img_list = []
-            for img_path in sorted(image_files):  # Sort by filename
-                img = Image.open(str(img_path))
-                # Convert RGBA to RGB if necessary
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (255, 255, 255))
-                    background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                    img = background
-                elif img.mode != 'RGB':
-                    img = img.convert('RGB')
-                img_list.append(img)
-                images.append((img_path.name, img.size))
-            
-            if not img_list:
+        def done(result: Optional[ImageConversion]):
+            if result is None:
                 return
-            
-            # Calculate optimal target size (use max width and normalize height)
-            # This maintains aspect ratio consistency
-            max_width = max(img.width for img in img_list)
-            max_height = max(img.height for img in img_list)
-            
-            # Use A4-like aspect ratio (210x297mm) for PDF
-            # Standard DPI for PDF is 72, but we use 150 for better quality
-            dpi = 150
-            a4_width_pixels = int(210 * dpi / 25.4)  # ~1240px at 150dpi
-            a4_height_pixels = int(297 * dpi / 25.4)  # ~1754px at 150dpi
-            
-            # Scale to fit A4 while maintaining aspect ratio
-            aspect_ratio = max_width / max_height
-            if aspect_ratio > (a4_width_pixels / a4_height_pixels):
-                # Image is wider than A4
-                target_width = a4_width_pixels
-                target_height = int(a4_width_pixels / aspect_ratio)
-            else:
-                # Image is taller than A4
-                target_height = a4_height_pixels
-                target_width = int(a4_height_pixels * aspect_ratio)
-            
-            # Second pass: resize all images to consistent size
-            resized_images = []
-            for img in img_list:
-                # Resize with high-quality resampling
-                resized_img = img.resize(
-                    (target_width, target_height),
-                    Image.Resampling.LANCZOS
-                )
-                resized_images.append(resized_img)
-            
-            if resized_images:
-                # Create PDF with consistent image sizes
-                resized_images[0].save(
-                    output_path,
-                    save_all=True,
-                    append_images=resized_images[1:] if len(resized_images) > 1 else [],
-                    optimize=False,  # Don't compress to maintain quality
-                    quality=95  # High quality
-                )
-                
-                # Show success message with scaling info
-                msg = f"✓ PDF created from {len(resized_images)} images!\n\n"
-                msg += f"Original sizes: {min(img.width for img in img_list)}×{min(img.height for img in img_list)} to "
-                msg += f"{max_width}×{max_height}px\n"
-                msg += f"Normalized to: {target_width}×{target_height}px\n"
-                msg += f"Saved to: {output_path}"
-                QMessageBox.information(self, "Success", msg)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to create PDF: {e}")
+            # Show success message with scaling info
+            msg = f"✓ PDF created from {result.count} images!\n\n"
+            msg += f"Original sizes: {result.smallest[0]}×{result.smallest[1]} to "
+            msg += f"{result.largest[0]}×{result.largest[1]}px\n"
+            msg += f"Normalized to: {result.size[0]}×{result.size[1]}px\n"
+            msg += f"Saved to: {output_path}"
+            QMessageBox.information(self, "Success", msg)
+        
+        paths = sorted(image_files)  # Sort by filename
+        self._submit_job(
+            f"Convert {len(paths)} images to PDF",
+            lambda progress: images_to_pdf(paths, Path(output_path), progress),
+            done,
+        )
+
+    def _submit_job(self, title: str, fn, on_done=None) -> Job:
+        """Queue ``fn(progress)`` on the job runner and show it in the status bar."""
+        job = self.job_runner.submit(title, fn, on_done)
+        self._update_job_status()
+        return job
+
+    def _on_job_started(self, job: Job):
+        self.job_progress.setValue(0)
+        self._update_job_status()
+
+    def _on_job_progress(self, job: Job, done: int, total: int):
+        if self.job_runner.jobs and job is self.job_runner.jobs[0]:
+            self.job_progress.setMaximum(max(total, 1))
+            self.job_progress.setValue(done)
+
+    def _on_job_finished(self, job: Job, result, error):
+        """Report a finished job and move the status bar on to the next one."""
+        self._update_job_status()
+        if error is None:
+            if job.on_done is not None:
+                job.on_done(result)
+        elif isinstance(error, JobCancelled):
+            self.statusBar().showMessage(f"{job.title}: cancelled", 5000)
+        else:
+            QMessageBox.critical(self, "Error", f"{job.title} failed: {error}")
+
+    def _update_job_status(self):
+        """Show the running job (and how many wait behind it) in the status bar."""
+        jobs = self.job_runner.jobs
+        for widget in (self.job_label, self.job_progress, self.job_cancel_btn):
+            widget.setVisible(bool(jobs))
+        if jobs:
+            queued = f" (+{len(jobs) - 1} queued)" if len(jobs) > 1 else ""
+            self.job_label.setText(jobs[0].title + queued)
+
+    def cancel_current_job(self):
+        """Cancel the job shown in the status bar."""
+        if self.job_runner.jobs:
+            self.job_runner.jobs[0].cancel()
 
     def next_page(self):
         """Go to next page."""
@@ -958,6 +1284,35 @@ class PDFReaderGUI(QMainWindow):
         self.zoom_label.setText("Fit")
         self.update_preview()
 
+    def set_continuous_scroll(self, enabled: bool):
+        """Switch between one page at a time and a continuously scrolling document."""
+        self.continuous_scroll = enabled
+        self.settings.setValue("continuous_scroll", enabled)
+        if self.current_pdf in self.sessions:
+            self.update_preview()
+
+    def set_show_thumbnails(self, enabled: bool):
+        """Show or hide the page thumbnail strip."""
+        self.show_thumbnails = enabled
+        self.settings.setValue("show_thumbnails", enabled)
+        if self.current_pdf in self.sessions:
+            self.update_preview()
+
+    def set_render_cache_size(self):
+        """Ask for the rendered-page memory budget (MB) and remember it."""
+        used_mb = self.render_cache.bytes_used / (1024 * 1024)
+        cache_mb, ok = QInputDialog.getInt(
+            self,
+            "Render Cache",
+            f"Memory for rendered pages in MB (in use: {used_mb:.0f} MB):",
+            self.render_cache.max_bytes // (1024 * 1024),
+            MIN_RENDER_CACHE_MB,
+            16384,
+        )
+        if ok:
+            self.render_cache.set_max_bytes(cache_mb * 1024 * 1024)
+            self.settings.setValue("render_cache_mb", cache_mb)
+
     def on_pdf_preview_enter(self):
         """Mouse enters PDF preview."""
         self.page_image_label.setStyleSheet("border: 2px solid #0066cc; background-color: #f0f8ff;")
@@ -1016,16 +1371,38 @@ class PDFReaderGUI(QMainWindow):
                     item.setData(Qt.UserRole, str(path))
                     self.file_list.addItem(item)
 
+    def closeEvent(self, event):
+        """Release open documents on exit."""
+        self.prefetcher.shutdown()
+        self.progressive.shutdown()
+        self.text_loader.shutdown()
+        self.render_scheduler.shutdown()
+        self.job_runner.shutdown()
+        for path in list(self.sessions):
+            self._close_session(path)
+        super().closeEvent(event)
+
     def resizeEvent(self, event):
         """Handle window resize."""
         super().resizeEvent(event)
-        # 在 fit 模式下窗口改变大小时，立即更新预览以保证高度适配
+        # fit 模式下拖动窗口时先缩放现有图像，停止拖动后再按新尺寸渲染一次
         if self.fit_to_window and self.current_pdf and event.size() != event.oldSize():
-            # 直接调用 update_preview，确保使用最新的滚动区域尺寸
-            self.update_preview()
+            if self.current_pixmap is not None:
+                target_width = self.scroll_area.width() - 20
+                if target_width > 0:
+                    self.page_image_label.setPixmap(
+                        self.current_pixmap.scaledToWidth(target_width, Qt.FastTransformation)
+                    )
+            self._resize_timer.start()
 
+    def _finish_resize(self):
+        """Render at the settled window size once resizing has paused."""
+        if self.fit_to_window and self.current_pdf:
+            self.update_preview()
 
 def main():
+    # Render workers are spawned processes; frozen (PyInstaller) builds need this
+    multiprocessing.freeze_support()
     app = QApplication([])
     window = PDFReaderGUI()
     window.show()
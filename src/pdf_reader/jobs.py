@@ -0,0 +1,104 @@
+"""Background jobs for the Qt viewer: long document operations that run off the GUI
+thread, one at a time in submission order, with progress and cancellation."""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .operations import Progress
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's progress callback once the job has been cancelled."""
+
+
+class Job:
+    """One queued operation; ``fn(progress)`` calls ``progress(done, total)`` as it goes.
+
+    ``on_done(result)`` runs on the GUI thread when ``fn`` returns normally.
+    """
+
+    def __init__(
+        self, title: str, fn: Callable[[Progress], Any], on_done: Optional[Callable[[Any], None]] = None
+    ):
+        self.title = title
+        self.fn = fn
+        self.on_done = on_done
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Drop the job if it is still queued, or stop it at its next progress report."""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class JobRunner(QObject):
+    """Run ``Job`` objects on one worker thread and report on them through signals.
+
+    Jobs queue up behind each other, so the user can start several operations and
+    keep browsing. ``started``, ``progress`` and ``finished`` are delivered on the
+    GUI thread; ``finished(job, result, error)`` has ``error`` set to the exception
+    the job raised (``JobCancelled`` when it was cancelled) or None.
+    """
+
+    started = pyqtSignal(object)
+    progress = pyqtSignal(object, int, int)
+    finished = pyqtSignal(object, object, object)
+    _done = pyqtSignal(object, object, object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs")
+        self.jobs: List[Job] = []  # queued and running, oldest first
+        self._done.connect(self._on_done)
+
+    def submit(
+        self, title: str, fn: Callable[[Progress], Any], on_done: Optional[Callable[[Any], None]] = None
+    ) -> Job:
+        job = Job(title, fn, on_done)
+        self.jobs.append(job)
+        job.future = self._executor.submit(self._run, job)
+        job.future.add_done_callback(partial(self._finished, job))
+        return job
+
+    def cancel_all(self) -> None:
+        for job in list(self.jobs):
+            job.cancel()
+
+    def shutdown(self) -> None:
+        self.cancel_all()  # also cancels the queued futures
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job: Job) -> Any:
+        if job.cancelled:
+            raise JobCancelled()
+        self.started.emit(job)
+        return job.fn(partial(self._report, job))
+
+    def _report(self, job: Job, done: int, total: int) -> None:
+        if job.cancelled:
+            raise JobCancelled()
+        self.progress.emit(job, done, total)
+
+    def _finished(self, job: Job, future: Future) -> None:
+        # Runs on the worker thread (or wherever the future was cancelled)
+        if future.cancelled():
+            self._done.emit(job, None, JobCancelled())
+        else:
+            error = future.exception()
+            self._done.emit(job, None if error else future.result(), error)
+
+    def _on_done(self, job: Job, result: Any, error: Optional[BaseException]) -> None:
+        if job in self.jobs:
+            self.jobs.remove(job)
+        self.finished.emit(job, result, error)
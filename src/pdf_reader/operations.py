@@ -0,0 +1,261 @@
+"""Document operations shared by the CLI and the GUI: split, merge, text export and
+image conversion.
+
+Each takes an optional ``progress(done, total)`` callback, called after every page
+(or image). Callers stop an operation early by raising from the callback; output
+files only appear once all pages are in, so a stopped run leaves nothing behind.
+"""
+from __future__ import annotations
+
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .cache import TextCache, extract_cached
+
+Progress = Callable[[int, int], None]
+
+
+def _report(progress: Optional[Progress], done: int, total: int) -> None:
+    if progress is not None:
+        progress(done, total)
+
+
+def split_pdf(pdf: Path, indexes: Sequence[int], output: Path, progress: Optional[Progress] = None) -> int:
+    """Copy the zero-based pages ``indexes`` of ``pdf`` into ``output``; returns the page count."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(str(pdf))
+    writer = PdfWriter()
+    for done, idx in enumerate(indexes, 1):
+        writer.add_page(reader.pages[idx])
+        _report(progress, done, len(indexes))
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("wb") as f:
+        writer.write(f)
+    return len(indexes)
+
+
+def merge_pdfs(pdfs: Sequence[Path], output: Path, progress: Optional[Progress] = None) -> int:
+    """Concatenate every page of ``pdfs`` into ``output``; returns the page count."""
+    from pypdf import PdfReader, PdfWriter
+
+    readers = [PdfReader(str(pdf)) for pdf in pdfs]
+    total = sum(len(reader.pages) for reader in readers)
+    writer = PdfWriter()
+    done = 0
+    for reader in readers:
+        for page in reader.pages:
+            writer.add_page(page)
+            done += 1
+            _report(progress, done, total)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("wb") as f:
+        writer.write(f)
+    return total
+
+
+def export_text(
+    pdf: Path,
+    indexes: Sequence[int],
+    output: Path,
+    engine: str = "pdfplumber",
+    cache: Optional[TextCache] = None,
+    progress: Optional[Progress] = None,
+) -> str:
+    """Write the text of ``indexes`` to ``output``, pages separated by blank lines."""
+    texts: List[str] = []
+    for done, (_, text) in enumerate(extract_cached(pdf, indexes, engine, cache=cache), 1):
+        texts.append(text)
+        _report(progress, done, len(indexes))
+
+    combined = "\n\n".join(texts)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(combined, encoding="utf-8")
+    return combined
+
+
+# Pages are A4 (210 x 297 mm) at 150 dpi, 1240 x 1753 pixels
+IMAGE_PDF_DPI = 150
+A4_PIXELS = (int(210 * IMAGE_PDF_DPI / 25.4), int(297 * IMAGE_PDF_DPI / 25.4))
+IMAGE_JPEG_QUALITY = 95
+
+
+@dataclass
+class ImageConversion:
+    """What ``images_to_pdf`` did, for reporting."""
+
+    count: int
+    smallest: Tuple[int, int]  # smallest width and height among the sources
+    largest: Tuple[int, int]  # largest width and height among the sources
+    size: Tuple[int, int]  # the size every page was scaled to
+
+
+class _JpegPdfWriter:
+    """Write a PDF of full-page JPEG images to ``fp`` one page at a time.
+
+    Only object offsets are kept in memory, so the output can have any number of
+    pages. Pages measure one point per pixel, like PIL's PDF writer.
+    """
+
+    _CATALOG, _PAGES = 1, 2  # written last, once every page is known
+
+    def __init__(self, fp: BinaryIO):
+        self.fp = fp
+        self.offsets: Dict[int, int] = {}
+        self.pages: List[int] = []
+        self._next = 3
+        fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _object(self, number: int, dictionary: str, stream: Optional[bytes] = None) -> None:
+        self.offsets[number] = self.fp.tell()
+        self.fp.write(f"{number} 0 obj\n{dictionary}\n".encode("ascii"))
+        if stream is not None:
+            self.fp.write(b"stream\n" + stream + b"\nendstream\n")
+        self.fp.write(b"endobj\n")
+
+    def add_jpeg(self, data: bytes, width: int, height: int, colorspace: str = "DeviceRGB") -> None:
+        image, content, page = self._next, self._next + 1, self._next + 2
+        self._next += 3
+        self._object(
+            image,
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /{colorspace}"
+            f" /BitsPerComponent 8 /Filter /DCTDecode /Length {len(data)} >>",
+            data,
+        )
+        ops = f"q {width} 0 0 {height} 0 0 cm /Im0 Do Q".encode("ascii")
+        self._object(content, f"<< /Length {len(ops)} >>", ops)
+        self._object(
+            page,
+            f"<< /Type /Page /Parent {self._PAGES} 0 R /MediaBox [0 0 {width} {height}]"
+            f" /Resources << /XObject << /Im0 {image} 0 R >> >> /Contents {content} 0 R >>",
+        )
+        self.pages.append(page)
+
+    def close(self) -> None:
+        kids = " ".join(f"{page} 0 R" for page in self.pages)
+        self._object(self._PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>")
+        self._object(self._CATALOG, f"<< /Type /Catalog /Pages {self._PAGES} 0 R >>")
+        xref = self.fp.tell()
+        self.fp.write(f"xref\n0 {self._next}\n0000000000 65535 f \n".encode("ascii"))
+        for number in range(1, self._next):
+            self.fp.write(f"{self.offsets[number]:010d} 00000 n \n".encode("ascii"))
+        trailer = f"trailer\n<< /Size {self._next} /Root {self._CATALOG} 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+        self.fp.write(trailer.encode("ascii"))
+
+
+def _fit_a4(width: int, height: int) -> Tuple[int, int]:
+    """Largest size with the aspect ratio of ``width x height`` that fits ``A4_PIXELS``."""
+    a4_width, a4_height = A4_PIXELS
+    # Integer arithmetic, so an image that is already A4-shaped keeps its exact size
+    if width * a4_height > a4_width * height:
+        # Image is wider than A4
+        return a4_width, a4_width * height // width
+    # Image is taller than A4
+    return a4_height * width // height, a4_height
+
+
+# JPEG colour modes a PDF can embed as-is (CMYK JPEGs need Adobe-specific handling)
+_JPEG_COLORSPACES = {"RGB": "DeviceRGB", "L": "DeviceGray"}
+# resize() first shrinks by an integer factor with reduce() while the image is this
+# many times larger than the target; quality is indistinguishable from plain LANCZOS
+REDUCING_GAP = 3.0
+
+
+def _page_jpeg(path: Path, size: Tuple[int, int]) -> Tuple[bytes, str]:
+    """Return ``path`` as JPEG data of exactly ``size`` and its PDF colour space.
+
+    A JPEG that already has the page size is passed through untouched, with no
+    re-encoding loss; anything else is flattened to RGB, resized and encoded.
+    """
+    from PIL import Image
+
+    with Image.open(str(path)) as img:
+        if img.format == "JPEG" and img.size == size and img.mode in _JPEG_COLORSPACES:
+            return path.read_bytes(), _JPEG_COLORSPACES[img.mode]
+        # JPEGs decode straight at 1/2, 1/4 or 1/8 scale when that still covers the page
+        img.draft(None, size)
+        # Convert RGBA to RGB if necessary
+        if img.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        # Resize with high-quality resampling
+        if img.size != size:
+            img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+        # Still inside ``with``: an RGB image already at the page size is the lazily
+        # loaded original, which can't be read once its file is closed
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=IMAGE_JPEG_QUALITY)
+    return buffer.getvalue(), _JPEG_COLORSPACES["RGB"]
+
+
+def images_to_pdf(
+    paths: Sequence[Path],
+    output: Path,
+    progress: Optional[Progress] = None,
+    workers: Optional[int] = None,
+) -> Optional[ImageConversion]:
+    """Convert images to a PDF, one page each, all scaled to one A4-fitting size.
+
+    A first pass reads only the image headers to choose the page size. Images
+    are then decoded, resized and encoded on ``workers`` threads (default: one
+    per CPU) with only a few in flight, and each page is written as soon as the
+    ones before it are, so memory use does not grow with the number of images.
+    """
+    from PIL import Image
+
+    if not paths:
+        return None
+    sizes = []
+    for path in paths:
+        with Image.open(str(path)) as img:
+            sizes.append(img.size)
+    largest = (max(w for w, _ in sizes), max(h for _, h in sizes))
+    size = _fit_a4(*largest)
+
+    workers = workers or os.cpu_count() or 1
+    output.parent.mkdir(parents=True, exist_ok=True)
+    part = output.with_name(output.name + ".part")
+    pool = ThreadPoolExecutor(max_workers=workers)
+    pending: deque = deque()
+    try:
+        with part.open("wb") as fp:
+            writer = _JpegPdfWriter(fp)
+            done = 0
+            for path in paths:
+                pending.append(pool.submit(_page_jpeg, path, size))
+                if len(pending) >= 2 * workers:
+                    data, colorspace = pending.popleft().result()
+                    writer.add_jpeg(data, *size, colorspace=colorspace)
+                    done += 1
+                    _report(progress, done, len(paths))
+            while pending:
+                data, colorspace = pending.popleft().result()
+                writer.add_jpeg(data, *size, colorspace=colorspace)
+                done += 1
+                _report(progress, done, len(paths))
+            writer.close()
+        part.replace(output)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    finally:
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+    return ImageConversion(
+        count=len(paths),
+        smallest=(min(w for w, _ in sizes), min(h for _, h in sizes)),
+        largest=largest,
+        size=size,
+    )
@@ -0,0 +1,572 @@
+"""Rendering support for the Qt viewer: a byte-bounded cache of page images, a
+prefetcher that fills it with the pages around the current one, tiled
+rendering for zoom levels where a whole page would be too large, progressive
+(quick preview, then sharp) rendering of uncached pages, a render queue shared by the
+multi-page views, and background loading of the page text shown next to the image."""
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Hashable, Iterator, List, Optional, Set, Tuple, Union
+
+from PyQt5.QtCore import QObject, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from .document import DocumentSession, render_samples
+
+DEFAULT_RENDER_CACHE_MB = 256
+MIN_RENDER_CACHE_MB = 16  # below this a visible page evicts itself and re-renders forever
+DEFAULT_PREFETCH_RADIUS = 2  # pages on each side of the current one
+TILE_SIZE = 512  # pixels
+TILED_MIN_PIXELS = 4_000_000  # pages rendered larger than this are drawn in tiles
+PREVIEW_SCALE_DIVISOR = 4  # the quick pass renders at 1/4 of the target scale
+TILED_PREVIEW_PIXELS = 1_000_000  # size of the stand-in drawn under tiles still rendering
+TEXT_CACHE_PAGES = 512  # page texts kept in memory by PageTextLoader
+
+# (document path, page index, scale); scale is rounded so float noise still hits
+RenderKey = Tuple[Path, int, float]
+
+
+def render_key(path: Path, index: int, scale: float) -> RenderKey:
+    return (path, index, round(scale, 3))
+
+
+class RenderCache:
+    """LRU of rendered page ``QImage`` objects, bounded by total pixel bytes.
+
+    Entries are evicted least recently used first once their combined
+    ``sizeInBytes()`` exceeds ``max_bytes``, so a few 3x renders weigh as much as
+    many thumbnails. ``QImage`` (unlike ``QPixmap``) may be created off the GUI
+    thread, and the cache is locked so render workers can fill it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RENDER_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, QImage]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_used(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[QImage]:
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+            return image
+
+    def put(self, key: Hashable, image: QImage) -> None:
+        size = image.sizeInBytes()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.sizeInBytes()
+            # An image larger than the whole budget is shown but never cached
+            if size > self.max_bytes:
+                return
+            self._entries[key] = image
+            self._bytes += size
+            self._evict()
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def drop(self, path: Path) -> None:
+        """Forget every page of ``path`` (e.g. when its document is closed)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                self._bytes -= self._entries.pop(key).sizeInBytes()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and self._entries:
+            _, image = self._entries.popitem(last=False)
+            self._bytes -= image.sizeInBytes()
+
+
+# MuPDF sample layouts by component count (n); PIL modes with a matching QImage format
+_PIXMAP_FORMATS = {1: QImage.Format_Grayscale8, 3: QImage.Format_RGB888, 4: QImage.Format_RGBA8888}
+_PIL_FORMATS = {"L": QImage.Format_Grayscale8, "RGB": QImage.Format_RGB888, "RGBA": QImage.Format_RGBA8888}
+
+
+def qimage_from_pixmap(pix) -> QImage:
+    """Wrap a ``pymupdf.Pixmap``'s samples in a ``QImage`` without copying or encoding.
+
+    The image points straight at MuPDF's buffer, so the pixmap is kept as an
+    attribute of the image and lives exactly as long as it does. Qt's implicitly
+    shared copies (``QImage(image)``, same-format ``convertToFormat``) share that
+    buffer without the reference; use ``image.copy()`` for one that must outlive it.
+    """
+    image = QImage(pix.samples_ptr, pix.width, pix.height, pix.stride, _PIXMAP_FORMATS[pix.n])
+    image._samples = pix
+    return image
+
+
+def qimage_from_samples(width: int, height: int, stride: int, n: int, samples: bytes) -> QImage:
+    """``QImage`` over raw samples returned by ``render_samples`` (same ownership rule)."""
+    image = QImage(samples, width, height, stride, _PIXMAP_FORMATS[n])
+    image._samples = samples
+    return image
+
+
+def qimage_from_pil(img) -> QImage:
+    """``QImage`` over a PIL image's raw pixels (one memcpy, no PPM round trip)."""
+    if img.mode not in _PIL_FORMATS:
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    data = img.tobytes()
+    stride = len(data) // img.height if img.height else 0
+    image = QImage(data, img.width, img.height, stride, _PIL_FORMATS[img.mode])
+    image._samples = data
+    return image
+
+
+def render_page(
+    session: DocumentSession, index: int, scale: float, cache: Optional[RenderCache] = None
+) -> QImage:
+    """Return page ``index`` of ``session`` at ``scale``, from ``cache`` when possible."""
+    key = render_key(session.path, index, scale)
+    image = cache.get(key) if cache is not None else None
+    if image is None:
+        image = qimage_from_pixmap(session.render(index, scale))
+        if cache is not None:
+            cache.put(key, image)
+    return image
+
+
+def tile_key(path: Path, index: int, scale: float, col: int, row: int) -> Hashable:
+    return (*render_key(path, index, scale), col, row)
+
+
+def tile_clip(scale: float, col: int, row: int) -> Tuple[float, float, float, float]:
+    """The page area, in points, of the ``TILE_SIZE`` square at ``(col, row)``."""
+    x0, y0 = col * TILE_SIZE, row * TILE_SIZE
+    return (x0 / scale, y0 / scale, (x0 + TILE_SIZE) / scale, (y0 + TILE_SIZE) / scale)
+
+
+def render_tile(
+    session: DocumentSession,
+    index: int,
+    scale: float,
+    col: int,
+    row: int,
+    cache: Optional[RenderCache] = None,
+) -> QImage:
+    """Render the ``TILE_SIZE`` square at ``(col, row)`` of page ``index`` at ``scale``."""
+    key = tile_key(session.path, index, scale, col, row)
+    image = cache.get(key) if cache is not None else None
+    if image is None:
+        image = qimage_from_pixmap(session.render(index, scale, clip=tile_clip(scale, col, row)))
+        if cache is not None:
+            cache.put(key, image)
+    return image
+
+
+class TiledPage:
+    """A page too large to rasterize whole, drawn as ``TILE_SIZE`` tiles.
+
+    ``tiles`` only looks tiles up in the cache; the ones still missing are
+    queued with the ``RenderScheduler`` (``jobs``) and drawn from a small
+    ``preview`` of the whole page until they arrive. Tiles are cached per scale,
+    so scrolling back is free and memory follows the viewport.
+    """
+
+    client = "tiles"
+
+    def __init__(self, session: DocumentSession, index: int, scale: float, cache: RenderCache):
+        self.session = session
+        self.index = index
+        self.scale = scale
+        self.cache = cache
+        page_width, page_height = session.page_size(index)
+        self.width = int(page_width * scale)
+        self.height = int(page_height * scale)
+        # One preview scale per page, whatever the zoom, so the preview is rendered once
+        self._preview_scale = round(min(scale, (TILED_PREVIEW_PIXELS / (page_width * page_height)) ** 0.5), 3)
+        self._preview: Optional[QImage] = None
+
+    def _cells(self, rect: QRect) -> Iterator[Tuple[int, int]]:
+        rect = rect.intersected(QRect(0, 0, self.width, self.height))
+        if rect.isEmpty():
+            return
+        for row in range(rect.top() // TILE_SIZE, rect.bottom() // TILE_SIZE + 1):
+            for col in range(rect.left() // TILE_SIZE, rect.right() // TILE_SIZE + 1):
+                yield col, row
+
+    def owns(self, key: Hashable) -> bool:
+        """Whether ``key`` (from ``RenderScheduler.rendered``) is one of this page's tiles."""
+        return len(key) == 5 and key[:3] == render_key(self.session.path, self.index, self.scale)
+
+    def tile_rect(self, col: int, row: int) -> QRect:
+        return QRect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+
+    def tiles(self, rect: QRect) -> Iterator[Tuple[int, int, Optional[QImage]]]:
+        """Yield ``(x, y, image)`` for the tiles covering ``rect`` (page pixels);
+        ``image`` is None for a tile that isn't rendered yet."""
+        for col, row in self._cells(rect):
+            image = self.cache.get(tile_key(self.session.path, self.index, self.scale, col, row))
+            yield col * TILE_SIZE, row * TILE_SIZE, image
+
+    def jobs(self, rect: QRect) -> List["RenderJob"]:
+        """Render jobs for the missing tiles covering ``rect``, nearest its centre first."""
+        centre = rect.center()
+        missing = [
+            (self.session, self.index, self.scale, col, row)
+            for col, row in self._cells(rect)
+            if tile_key(self.session.path, self.index, self.scale, col, row) not in self.cache
+        ]
+        missing.sort(key=lambda job: (self.tile_rect(job[3], job[4]).center() - centre).manhattanLength())
+        return missing
+
+    def preview(self) -> QImage:
+        """The whole page at a low scale, to stretch over tiles that are still rendering."""
+        if self._preview is None:
+            self._preview = render_page(self.session, self.index, self._preview_scale, self.cache)
+        return self._preview
+
+
+# A page a view wants rendered: (session, page index, scale), plus (col, row) for one tile
+RenderJob = Union[Tuple[DocumentSession, int, float], Tuple[DocumentSession, int, float, int, int]]
+
+
+def _job_key(job: RenderJob) -> Hashable:
+    """The cache key ``job`` renders into (``render_key`` or ``tile_key``)."""
+    return (*render_key(job[0].path, job[1], job[2]), *job[3:])
+
+
+class RenderPrefetcher:
+    """Speculatively render the neighbours of the current page into the cache.
+
+    ``schedule`` hands pages N+1, N-1, N+2, N-2, ... to the ``RenderScheduler`` as
+    a background client, so they render in the worker processes and only with a
+    worker to spare.
+    Each call replaces the previous list; pages already cached are skipped.
+    """
+
+    client = "prefetch"
+
+    def __init__(self, scheduler: "RenderScheduler", radius: int = DEFAULT_PREFETCH_RADIUS):
+        self.scheduler = scheduler
+        self.radius = radius
+
+    def schedule(self, session: DocumentSession, index: int, scale: float) -> None:
+        jobs: List[RenderJob] = []
+        for offset in range(1, self.radius + 1):
+            for neighbour in (index + offset, index - offset):
+                if 0 <= neighbour < session.page_count:
+                    jobs.append((session, neighbour, scale))
+        self.scheduler.request(self.client, jobs, background=True)
+
+    def cancel(self) -> None:
+        self.scheduler.cancel(self.client)
+
+    def shutdown(self) -> None:
+        self.cancel()
+
+
+class RenderWorkers:
+    """A lazily spawned pool of render processes shared by the viewer's renderers.
+
+    MuPDF holds the GIL while it rasterizes, so any render that must not block
+    the UI runs in one of these processes (``render_samples``), never on a thread.
+    The viewer's renderers all reach it through the ``RenderScheduler``, which
+    also falls back to rendering on the GUI thread when a worker fails.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._paths: Set[str] = set()  # documents the current pool may hold open
+        self._pending: Set[Future] = set()  # for shutdown; cancel_futures needs Python 3.9
+
+    def submit(
+        self, path: Path, index: int, scale: float, clip: Optional[Tuple[float, float, float, float]] = None
+    ) -> Future:
+        # Spawned lazily: starting workers costs a few hundred milliseconds
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            self._paths = set()
+        self._paths.add(str(path))
+        try:
+            future = self._executor.submit(render_samples, str(path), index, scale, clip)
+        except Exception as e:  # noqa: BLE001 - reported through the future like a failed render
+            if isinstance(e, BrokenExecutor):
+                self._executor = None
+            future = Future()
+            future.set_exception(e)
+            return future
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        return future
+
+    def reset(self) -> None:
+        """Forget a broken pool; the next ``submit`` starts a fresh one."""
+        self._executor = None
+
+    def forget(self, path: Path) -> None:
+        """Make the workers let go of ``path`` once the viewer has closed it.
+
+        Workers keep their last few documents open, which keeps the file locked on
+        Windows, and a particular worker can't be addressed. So a pool that has
+        rendered ``path`` is retired: jobs already queued still finish, then its
+        processes exit, and the next ``submit`` starts a fresh pool.
+        """
+        if self._executor is not None and str(path) in self._paths:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            for future in list(self._pending):
+                future.cancel()
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class RenderScheduler(QObject):
+    """Render queue shared by the views that show many pages at once.
+
+    Each view (``client``) calls ``request`` with the pages it wants, most
+    important first, whenever its viewport moves; the new list replaces the
+    client's previous one, so pages scrolled past are dropped before they are
+    rendered. At most ``max_in_flight`` jobs run in the worker pool at a time
+    and clients take turns. Background clients (speculative work such as
+    prefetching) are only served while that leaves a slot free. Finished images
+    go into the cache and are announced through ``rendered(key, image)``, where
+    ``key`` is a ``tile_key`` for tile jobs. All bookkeeping happens on the GUI
+    thread.
+    """
+
+    rendered = pyqtSignal(object, object)
+    _job_done = pyqtSignal(object, object, object, object)  # key, session, samples, error
+
+    def __init__(
+        self,
+        cache: RenderCache,
+        pool: Optional[RenderWorkers] = None,
+        max_in_flight: int = 2,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = pool or RenderWorkers()
+        self.max_in_flight = max_in_flight
+        self._queues: "OrderedDict[str, List[RenderJob]]" = OrderedDict()
+        self._in_flight: set = set()
+        self._background: set = set()  # clients whose jobs only use spare slots
+        self._job_done.connect(self._on_job_done, Qt.QueuedConnection)
+
+    def request(self, client: str, jobs: List[RenderJob], background: bool = False) -> None:
+        self._queues[client] = [job for job in jobs if _job_key(job) not in self.cache]
+        if background:
+            self._background.add(client)
+        else:
+            self._background.discard(client)
+        self._dispatch()
+
+    def cancel(self, client: Optional[str] = None) -> None:
+        """Drop the queued jobs of ``client`` (or of every client)."""
+        if client is None:
+            self._queues.clear()
+            self._background.clear()
+        else:
+            self._queues.pop(client, None)
+            self._background.discard(client)
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self.pool.shutdown()
+
+    def _next_job(self, background: bool) -> Optional[RenderJob]:
+        # Round robin: the client served goes to the back of the line; background
+        # clients come after every other one, and only when ``background`` allows
+        for client in sorted(self._queues, key=lambda c: c in self._background):
+            if client in self._background and not background:
+                break
+            queue = self._queues[client]
+            while queue:
+                job = queue.pop(0)
+                key = _job_key(job)
+                if job[0].closed or key in self._in_flight or key in self.cache:
+                    continue
+                self._queues.move_to_end(client)
+                return job
+        return None
+
+    def _dispatch(self) -> None:
+        while len(self._in_flight) < self.max_in_flight:
+            job = self._next_job(background=len(self._in_flight) < self.max_in_flight - 1)
+            if job is None:
+                return
+            session, index, scale = job[:3]
+            key = _job_key(job)
+            self._in_flight.add(key)
+            clip = tile_clip(scale, *job[3:]) if len(job) == 5 else None
+            future = self.pool.submit(session.path, index, scale, clip)
+            future.add_done_callback(partial(self._finished, key, session))
+
+    def _finished(self, key: Hashable, session: DocumentSession, future: Future) -> None:
+        # Runs on the executor's thread; hand the result to the GUI thread
+        error = None if future.cancelled() else future.exception()
+        samples = None if future.cancelled() or error else future.result()
+        try:
+            self._job_done.emit(key, session, samples, error)
+        except RuntimeError:  # the scheduler was deleted (window closed) while the job ran
+            pass
+
+    def _on_job_done(self, key: Hashable, session: DocumentSession, samples, error) -> None:
+        self._in_flight.discard(key)
+        image = None
+        if samples is not None:
+            # Another renderer may have cached the page while this one was in flight
+            image = self.cache.get(key)
+            if image is None:
+                image = qimage_from_samples(*samples)
+                self.cache.put(key, image)
+        elif error is not None and not session.closed:
+            # The worker failed (or the pool broke): render here, and start a fresh pool next time
+            if isinstance(error, BrokenExecutor):
+                self.pool.reset()
+            try:
+                if len(key) == 5:
+                    image = render_tile(session, *key[1:], self.cache)
+                else:
+                    image = render_page(session, key[1], key[2], self.cache)
+            except Exception:  # noqa: BLE001 - the view keeps its placeholder
+                pass
+        if image is not None:
+            self.rendered.emit(key, image)
+        self._dispatch()
+
+
+class ProgressiveRenderer(QObject):
+    """Two-pass rendering for pages that aren't cached yet.
+
+    ``request`` renders a preview at a fraction of the target scale right away
+    and queues the full-resolution render with the ``RenderScheduler``, which
+    caches it and hands it back through ``sharp_ready(ticket, image)``. Each
+    request or ``cancel`` supersedes the previous one: its job is dropped if
+    still queued, and a result that arrives late is cached but not announced.
+    """
+
+    client = "sharp"
+    sharp_ready = pyqtSignal(int, object)
+
+    def __init__(self, scheduler: RenderScheduler, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.cache = scheduler.cache
+        self._key: Optional[Hashable] = None
+        self._ticket = 0
+        scheduler.rendered.connect(self._on_rendered)
+
+    def request(self, session: DocumentSession, index: int, scale: float) -> Tuple[int, QImage]:
+        """Return ``(ticket, preview)``; the sharp image follows via ``sharp_ready``."""
+        self.cancel()
+        preview = render_page(session, index, scale / PREVIEW_SCALE_DIVISOR, self.cache)
+        self._key = render_key(session.path, index, scale)
+        self.scheduler.request(self.client, [(session, index, scale)])
+        return self._ticket, preview
+
+    def cancel(self) -> None:
+        self._ticket += 1
+        self._key = None
+        self.scheduler.cancel(self.client)
+
+    def shutdown(self) -> None:
+        self.cancel()
+
+    def _on_rendered(self, key: Hashable, image: QImage) -> None:
+        if self._key is not None and key == self._key:
+            self._key = None
+            self.sharp_ready.emit(self._ticket, image)
+
+
+class PageTextLoader(QObject):
+    """Extract page text on a background thread so page flips never wait for it.
+
+    ``request`` returns the text at once when it is in the in-memory LRU and
+    otherwise queues the extraction; the result is announced through
+    ``text_ready(ticket, text)``. As with ``ProgressiveRenderer`` each request
+    supersedes the previous one, and text for a page the user has already left
+    is cached but not announced.
+    """
+
+    text_ready = pyqtSignal(int, str)
+
+    def __init__(self, max_pages: int = TEXT_CACHE_PAGES, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.max_pages = max_pages
+        self._texts: "OrderedDict[Tuple[Path, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-text")
+        self._future: Optional[Future] = None
+        self._ticket = 0
+
+    @property
+    def ticket(self) -> int:
+        """The ticket of the latest request; anything older is stale."""
+        return self._ticket
+
+    def request(self, session: DocumentSession, index: int) -> Tuple[int, Optional[str]]:
+        """Return ``(ticket, text)``; ``text`` is None when it follows via ``text_ready``."""
+        self.cancel()
+        ticket = self._ticket
+        with self._lock:
+            text = self._texts.get((session.path, index))
+            if text is not None:
+                self._texts.move_to_end((session.path, index))
+                return ticket, text
+        self._future = self._executor.submit(self._load, ticket, session, index)
+        return ticket, None
+
+    def cancel(self) -> None:
+        self._ticket += 1
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def drop(self, path: Path) -> None:
+        """Forget the cached text of every page of ``path``."""
+        with self._lock:
+            for key in [k for k in self._texts if k[0] == path]:
+                del self._texts[key]
+
+    def shutdown(self) -> None:
+        self.cancel()  # the only future that can still be queued
+        self._executor.shutdown(wait=False)
+
+    def _load(self, ticket: int, session: DocumentSession, index: int) -> None:
+        if ticket != self._ticket or session.closed:
+            return
+        try:
+            text = session.text(index)
+        except Exception as e:  # noqa: BLE001 - shown in the text panel instead
+            if ticket == self._ticket:
+                self.text_ready.emit(ticket, f"Error: {e}")
+            return
+        with self._lock:
+            self._texts[(session.path, index)] = text
+            while len(self._texts) > self.max_pages:
+                self._texts.popitem(last=False)
+        if ticket == self._ticket:
+            self.text_ready.emit(ticket, text)
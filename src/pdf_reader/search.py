@@ -0,0 +1,929 @@
+"""Full-text inverted index over extracted page text, with BM25 ranking.
+
+The index unit is a single page of a document. Each term maps to a postings list
+of ``(unit, positions)`` so phrase queries can be answered from the index alone.
+
+An index directory holds immutable segments plus a manifest. Re-indexing only
+extracts documents whose fingerprint (size, mtime, content hash) changed and
+writes them to a new segment; replaced or deleted documents are tombstoned.
+Fingerprints live in a separate file that only the indexer reads; each segment
+carries its own table of document paths for the search side.
+Segments are merged in the background and swapped in by rewriting the manifest.
+
+Segments use a compact binary layout (sorted term dictionary, delta+varint
+postings) and are opened with ``mmap``, so a query decodes only the postings of
+the terms it mentions instead of loading the whole index.
+
+Query syntax:
+
+* ``alpha beta``          both terms (AND is implied)
+* ``alpha OR beta``       either term
+* ``alpha -beta``         ``NOT beta`` also works
+* ``"sink endpoint"``     exact phrase
+* ``(a OR b) c``          grouping
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import socket
+import struct
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .cache import file_digest
+
+MANIFEST_FILE = "manifest.json"
+TERMS_FILE = "terms.bin"
+POSTINGS_FILE = "postings.bin"
+UNITS_FILE = "units.bin"
+TEXT_FILE = "text.bin"
+DOCS_FILE = "docs.bin"
+MANIFEST_LOCK = "manifest.lock"  # held briefly while the manifest is rewritten
+WRITE_LOCK = "write.lock"  # one indexing run at a time
+MERGE_LOCK = "merge.lock"  # one merge at a time
+FORMAT_VERSION = 4
+
+_TERMS_MAGIC = b"PDRT"
+_UNITS_MAGIC = b"PDRU"
+_DOCS_MAGIC = b"PDRD"
+_TERMS_HEADER = struct.Struct("<4sI")  # magic, term count
+_TERM_RECORD = struct.Struct("<IHQII")  # blob offset, term length, postings offset/length, df
+_UNITS_HEADER = struct.Struct("<4sIQ")  # magic, unit count, total token length
+_UNIT_RECORD = struct.Struct("<IIIQI")  # doc, page, token length, text offset/length
+_DOCS_HEADER = struct.Struct("<4sII")  # magic, document count, most pages in a document
+_DOC_RECORD = struct.Struct("<IIII")  # doc id, page count, path offset/length
+
+# Longer tokens (base64 blobs, garbled streams) still take a position but aren't indexed
+MAX_TERM_LENGTH = 64
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# The manifest lock is only held for a rewrite; if it is older than this the holder
+# crashed. Write/merge locks can legitimately be held for a long time, so they are
+# only broken when the process recorded in them is no longer running.
+STALE_MANIFEST_LOCK_SECONDS = 60
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_QUERY_RE = re.compile(r'"([^"]*)"|(\()|(\))|(-)?([^\s()"]+)')
+
+UnitKey = Tuple[int, int]  # (segment position, unit within segment)
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; positions in the returned list are term positions."""
+    return [token.lower() for token in _TOKEN_RE.findall(text)]
+
+
+@dataclass
+class Hit:
+    path: str
+    page: int  # zero-based
+    score: float
+    snippet: str
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether process ``pid`` is running on this machine (errs towards True)."""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill() would terminate the process on Windows
+        import ctypes
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # access denied: exists, not ours
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _holder_dead(path: Path) -> bool:
+    """True if the lock at ``path`` was taken by a process on this host that has exited."""
+    try:
+        owner = path.read_text(encoding="utf-8").split()
+    except FileNotFoundError:
+        return False
+    if not owner:
+        # Killed between creating the file and writing to it
+        return time.time() - path.stat().st_mtime > STALE_MANIFEST_LOCK_SECONDS
+    if len(owner) > 1 and owner[1] != socket.gethostname():
+        return False  # lock on a shared filesystem, held from another machine
+    try:
+        return not _pid_alive(int(owner[0]))
+    except ValueError:
+        return False
+
+
+@contextmanager
+def _locked(
+    path: Path,
+    timeout: float = 30.0,
+    stale_after: Optional[float] = None,
+    break_dead: bool = False,
+) -> Iterator[None]:
+    """Cross-process mutex based on exclusive creation of ``path``.
+
+    The lock file records the holder's pid and host. A lock older than
+    ``stale_after`` seconds is broken, and with ``break_dead`` so is one whose
+    holder has exited without releasing it.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(str(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if (
+                    stale_after is not None and time.time() - path.stat().st_mtime > stale_after
+                ) or (break_dead and _holder_dead(path)):
+                    path.unlink(missing_ok=True)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for {path}; delete it if no other run is active")
+            time.sleep(0.05)
+    try:
+        os.write(fd, f"{os.getpid()} {socket.gethostname()}".encode("utf-8"))
+        os.close(fd)
+        yield
+    finally:
+        path.unlink(missing_ok=True)
+
+
+def _manifest_lock(index_dir: Path):
+    return _locked(index_dir / MANIFEST_LOCK, stale_after=STALE_MANIFEST_LOCK_SECONDS)
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def fingerprint(path: Path, digest: Optional[str] = None) -> Dict[str, object]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest or file_digest(path)}
+
+
+class SegmentWriter:
+    """Accumulate pages in memory and write them out as one immutable segment."""
+
+    def __init__(self) -> None:
+        self.docs: List[Tuple[int, str, int]] = []  # (doc, path, pages)
+        self.units: List[Tuple[int, int, int]] = []  # (doc, page, length)
+        self.texts: List[str] = []
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+
+    def add_document(self, doc_id: int, path: str, pages: Iterable[Tuple[int, str]]) -> int:
+        """Index ``pages`` of ``path`` under ``doc_id``; returns the number of pages added."""
+        count = 0
+        for page, text in pages:
+            unit = len(self.units)
+            tokens = tokenize(text)
+            self.units.append((doc_id, page, len(tokens)))
+            self.texts.append(text)
+            for position, term in enumerate(tokens):
+                if len(term) <= MAX_TERM_LENGTH:
+                    self.postings.setdefault(term, {}).setdefault(unit, []).append(position)
+            count += 1
+        self.docs.append((doc_id, path, count))
+        return count
+
+    def write(self, path: Path) -> None:
+        """Write the segment directory ``path`` (see ``Segment`` for the layout)."""
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        texts = bytearray()
+        with (tmp / UNITS_FILE).open("wb") as f:
+            total_length = sum(length for _, _, length in self.units)
+            f.write(_UNITS_HEADER.pack(_UNITS_MAGIC, len(self.units), total_length))
+            for (doc_id, page, length), text in zip(self.units, self.texts):
+                blob = zlib.compress(text.encode("utf-8"))
+                f.write(_UNIT_RECORD.pack(doc_id, page, length, len(texts), len(blob)))
+                texts += blob
+        (tmp / TEXT_FILE).write_bytes(bytes(texts))
+        del texts
+
+        records = bytearray()
+        blob = bytearray()
+        for doc_id, doc_path, count in sorted(self.docs):
+            encoded = doc_path.encode("utf-8")
+            records += _DOC_RECORD.pack(doc_id, count, len(blob), len(encoded))
+            blob += encoded
+        with (tmp / DOCS_FILE).open("wb") as f:
+            max_pages = max((count for _, _, count in self.docs), default=0)
+            f.write(_DOCS_HEADER.pack(_DOCS_MAGIC, len(self.docs), max_pages))
+            f.write(records)
+            f.write(blob)
+
+        # Sort by encoded bytes so the reader can binary-search raw UTF-8
+        terms = sorted((term.encode("utf-8"), term) for term in self.postings)
+        postings = bytearray()
+        records = bytearray()
+        blob = bytearray()
+        for encoded, term in terms:
+            start = len(postings)
+            previous_unit = 0
+            plist = self.postings[term]
+            for unit in sorted(plist):
+                positions = plist[unit]
+                _encode_varint(unit - previous_unit, postings)
+                _encode_varint(len(positions), postings)
+                previous_position = 0
+                for position in positions:
+                    _encode_varint(position - previous_position, postings)
+                    previous_position = position
+                previous_unit = unit
+            records += _TERM_RECORD.pack(
+                len(blob), len(encoded), start, len(postings) - start, len(plist)
+            )
+            blob += encoded
+        (tmp / POSTINGS_FILE).write_bytes(bytes(postings))
+        with (tmp / TERMS_FILE).open("wb") as f:
+            f.write(_TERMS_HEADER.pack(_TERMS_MAGIC, len(terms)))
+            f.write(records)
+            f.write(blob)
+
+        os.replace(tmp, path)
+
+
+def _encode_varint(value: int, out: bytearray) -> None:
+    """LEB128: 7 bits per byte, high bit set on every byte except the last."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varints(data: bytes) -> List[int]:
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def _map_file(path: Path):
+    """Read-only mmap of ``path``; empty files (which mmap rejects) map to b""."""
+    with path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Segment:
+    """Read-only, memory-mapped view of one segment directory.
+
+    Layout (all integers little-endian):
+
+    * ``terms.bin``    header, then one fixed-size record per term sorted by UTF-8
+      bytes (term offset/length into the trailing string blob, postings
+      offset/length, document frequency), then the string blob.
+    * ``postings.bin`` per term: ``unit delta, tf, position deltas...`` as varints.
+    * ``units.bin``    header (unit count, total token length), then one record per
+      page: doc id, page, token length, offset/length into ``text.bin``.
+    * ``text.bin``     zlib-compressed page text, used for snippets and merges.
+    * ``docs.bin``     header (document count, most pages in one document), then one
+      record per document sorted by id (page count, path offset/length into the
+      trailing UTF-8 blob), then the blob.
+
+    Opening a segment maps the files without reading them, so a query only
+    touches the term records it bisects and the postings it decodes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._terms = self._postings = self._units = self._text = self._docs = b""
+        try:
+            self._terms = _map_file(path / TERMS_FILE)
+            self._postings = _map_file(path / POSTINGS_FILE)
+            self._units = _map_file(path / UNITS_FILE)
+            self._text = _map_file(path / TEXT_FILE)
+            self._docs = _map_file(path / DOCS_FILE)
+            magic, self.term_count = _TERMS_HEADER.unpack_from(self._terms, 0)
+            unit_magic, self.unit_count, self.total_length = _UNITS_HEADER.unpack_from(self._units, 0)
+            docs_magic, self.doc_count, self.max_pages = _DOCS_HEADER.unpack_from(self._docs, 0)
+            if (magic, unit_magic, docs_magic) != (_TERMS_MAGIC, _UNITS_MAGIC, _DOCS_MAGIC):
+                raise ValueError(f"Not a search index segment: {path}")
+        except BaseException:
+            # Don't leave the files that did open mapped
+            self.close()
+            raise
+        self._blob_start = _TERMS_HEADER.size + self.term_count * _TERM_RECORD.size
+        self._paths_start = _DOCS_HEADER.size + self.doc_count * _DOC_RECORD.size
+
+    def close(self) -> None:
+        for mapped in (self._terms, self._postings, self._units, self._text, self._docs):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def _term_record(self, i: int) -> Tuple[bytes, int, int, int]:
+        term_offset, term_len, post_offset, post_len, df = _TERM_RECORD.unpack_from(
+            self._terms, _TERMS_HEADER.size + i * _TERM_RECORD.size
+        )
+        start = self._blob_start + term_offset
+        return self._terms[start : start + term_len], post_offset, post_len, df
+
+    def _find_term(self, term: str) -> Optional[Tuple[int, int, int]]:
+        target = term.encode("utf-8")
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_record(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.term_count:
+            found, post_offset, post_len, df = self._term_record(lo)
+            if found == target:
+                return post_offset, post_len, df
+        return None
+
+    def postings(self, term: str) -> List[Tuple[int, List[int]]]:
+        record = self._find_term(term)
+        if record is None:
+            return []
+        post_offset, post_len, _ = record
+        values = _decode_varints(self._postings[post_offset : post_offset + post_len])
+        result = []
+        unit = 0
+        i = 0
+        while i < len(values):
+            unit += values[i]
+            tf = values[i + 1]
+            positions = []
+            position = 0
+            for delta in values[i + 2 : i + 2 + tf]:
+                position += delta
+                positions.append(position)
+            result.append((unit, positions))
+            i += 2 + tf
+        return result
+
+    def unit(self, i: int) -> Tuple[int, int, int]:
+        """``(doc, page, token length)`` of unit ``i``."""
+        doc_id, page, length, _, _ = _UNIT_RECORD.unpack_from(
+            self._units, _UNITS_HEADER.size + i * _UNIT_RECORD.size
+        )
+        return doc_id, page, length
+
+    def text(self, i: int) -> str:
+        _, _, _, offset, size = _UNIT_RECORD.unpack_from(
+            self._units, _UNITS_HEADER.size + i * _UNIT_RECORD.size
+        )
+        return zlib.decompress(self._text[offset : offset + size]).decode("utf-8")
+
+    def _doc_record(self, i: int) -> Tuple[int, int, str]:
+        doc_id, count, offset, size = _DOC_RECORD.unpack_from(
+            self._docs, _DOCS_HEADER.size + i * _DOC_RECORD.size
+        )
+        start = self._paths_start + offset
+        return doc_id, count, self._docs[start : start + size].decode("utf-8")
+
+    def documents(self) -> Iterator[Tuple[int, str, int]]:
+        """Yield ``(doc, path, pages)`` for every document in the segment, by id."""
+        for i in range(self.doc_count):
+            doc_id, count, doc_path = self._doc_record(i)
+            yield doc_id, doc_path, count
+
+    def doc_path(self, doc_id: int) -> str:
+        lo, hi = 0, self.doc_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = _DOC_RECORD.unpack_from(self._docs, _DOCS_HEADER.size + mid * _DOC_RECORD.size)[0]
+            if found < doc_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.doc_count:
+            found, _, doc_path = self._doc_record(lo)
+            if found == doc_id:
+                return doc_path
+        raise KeyError(doc_id)
+
+    def pages(self, doc_ids: Set[int]) -> Iterator[Tuple[int, int, str]]:
+        """Yield ``(doc, page, text)`` for the units belonging to ``doc_ids``."""
+        for i in range(self.unit_count):
+            doc_id, page, _ = self.unit(i)
+            if doc_id in doc_ids:
+                yield doc_id, page, self.text(i)
+
+
+def _open_segments(index_dir: Path, entries: Iterable[dict]) -> List[Segment]:
+    """Open the segments named in manifest ``entries``; if one fails, close the rest."""
+    with ExitStack() as stack:
+        segments = []
+        for entry in entries:
+            segment = Segment(index_dir / entry["name"])
+            stack.callback(segment.close)
+            segments.append(segment)
+        stack.pop_all()
+    return segments
+
+
+class IndexManifest:
+    """The mutable part of an index: live segments, tombstones, document fingerprints.
+
+    ``docs`` maps a resolved PDF path to its id and fingerprint. It is kept in a
+    separate ``docs-NNNNNN.json`` named by the manifest and only read when loading
+    with ``docs=True``; searches get paths from the segments instead. A document
+    that is changed or removed keeps its postings in old segments, but its id is
+    added to ``deleted`` (a tombstone) so readers skip it until a merge drops it.
+    """
+
+    def __init__(
+        self, index_dir: Path, data: Optional[dict] = None, docs: Optional[Dict[str, dict]] = None
+    ):
+        self.index_dir = Path(index_dir)
+        data = data or {}
+        self.engine: str = data.get("engine", "pdfplumber")
+        self.next_doc: int = data.get("next_doc", 0)
+        self.next_segment: int = data.get("next_segment", 0)
+        self.docs_version: int = data.get("docs_version", 0)
+        self.docs: Optional[Dict[str, dict]] = docs  # None unless loaded
+        self.segments: List[dict] = data.get("segments", [])
+        self.deleted: Set[int] = set(data.get("deleted", []))
+
+    @classmethod
+    def load(cls, index_dir: Path, docs: bool = False) -> "IndexManifest":
+        path = Path(index_dir) / MANIFEST_FILE
+        if not path.exists():
+            return cls(index_dir, docs={} if docs else None)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format in {index_dir}; rebuild it")
+        manifest = cls(index_dir, data)
+        if docs:
+            docs_path = manifest.index_dir / manifest.docs_file
+            manifest.docs = (
+                json.loads(docs_path.read_text(encoding="utf-8")) if manifest.docs_version else {}
+            )
+        return manifest
+
+    @property
+    def docs_file(self) -> str:
+        return f"docs-{self.docs_version:06d}.json"
+
+    def save(self) -> None:
+        """Write the manifest, and a new fingerprint file if ``docs`` was loaded.
+
+        Fingerprints go to a fresh file that the manifest swap makes current, so
+        a crash never leaves them out of step with the segments.
+        """
+        old_docs = None
+        if self.docs is not None:
+            old_docs = self.docs_file if self.docs_version else None
+            self.docs_version += 1
+            _write_json(self.index_dir / self.docs_file, self.docs)
+        _write_json(self.index_dir / MANIFEST_FILE, {
+            "version": FORMAT_VERSION,
+            "engine": self.engine,
+            "next_doc": self.next_doc,
+            "next_segment": self.next_segment,
+            "docs_version": self.docs_version,
+            "segments": self.segments,
+            "deleted": sorted(self.deleted),
+        })
+        if old_docs:
+            (self.index_dir / old_docs).unlink(missing_ok=True)
+
+    def new_segment_name(self) -> str:
+        self.next_segment += 1
+        return f"seg-{self.next_segment:06d}"
+
+
+def plan_update(
+    manifest: IndexManifest, pdfs: Iterable[Path]
+) -> Tuple[List[Path], List[str], Dict[str, dict]]:
+    """Compare the corpus against recorded fingerprints.
+
+    Returns ``(to_index, removed_paths, refreshed)``: documents that are new or
+    changed, documents that disappeared, and unchanged documents whose mtime moved
+    (their fingerprint is refreshed without re-indexing).
+    """
+    to_index: List[Path] = []
+    refreshed: Dict[str, dict] = {}
+    seen = set()
+    for pdf in pdfs:
+        key = str(pdf.resolve())
+        seen.add(key)
+        known = manifest.docs.get(key)
+        if known is None:
+            to_index.append(pdf)
+            continue
+        st = pdf.stat()
+        if (st.st_size, st.st_mtime_ns) == (known["size"], known["mtime_ns"]):
+            continue
+        digest = file_digest(pdf)
+        if digest == known["sha256"]:
+            refreshed[key] = {**known, "mtime_ns": st.st_mtime_ns}
+        else:
+            to_index.append(pdf)
+    removed = [key for key in manifest.docs if key not in seen]
+    return to_index, removed, refreshed
+
+
+def update_index(
+    index_dir: Path,
+    pdfs: List[Path],
+    extract: Callable[[List[Path]], Iterator[Tuple[Path, Optional[List[Tuple[int, str]]]]]],
+    engine: str = "pdfplumber",
+) -> Dict[str, int]:
+    """Incrementally bring the index in ``index_dir`` in line with ``pdfs``.
+
+    Only new or changed documents are passed to ``extract``, which yields
+    ``(pdf, pages)`` pairs (``pages`` is None when extraction failed). They go
+    into a fresh segment; replaced and deleted documents are tombstoned.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    with _locked(index_dir / WRITE_LOCK, timeout=5.0, break_dead=True):
+        return _update_locked(index_dir, pdfs, extract, engine)
+
+
+def _update_locked(
+    index_dir: Path,
+    pdfs: List[Path],
+    extract: Callable[[List[Path]], Iterator[Tuple[Path, Optional[List[Tuple[int, str]]]]]],
+    engine: str,
+) -> Dict[str, int]:
+    manifest = IndexManifest.load(index_dir, docs=True)
+    if manifest.docs and manifest.engine != engine:
+        raise ValueError(
+            f"Index was built with engine {manifest.engine!r}; rebuild it to use {engine!r}"
+        )
+    to_index, removed, refreshed = plan_update(manifest, pdfs)
+
+    writer = SegmentWriter()
+    added: Dict[str, dict] = {}
+    failed = 0
+    for pdf, pages in extract(to_index):
+        if pages is None:
+            failed += 1
+            continue
+        doc_id = manifest.next_doc + len(added)
+        key = str(pdf.resolve())
+        count = writer.add_document(doc_id, key, pages)
+        added[key] = {"id": doc_id, "pages": count, **fingerprint(pdf)}
+
+    segment_name = None
+    if writer.docs:
+        with _manifest_lock(index_dir):
+            reserved = IndexManifest.load(index_dir)
+            segment_name = reserved.new_segment_name()
+            reserved.save()
+        writer.write(index_dir / segment_name)
+
+    with _manifest_lock(index_dir):
+        # Re-read so merges committed while we were extracting are kept
+        manifest = IndexManifest.load(index_dir, docs=True)
+        manifest.engine = engine
+        for key in removed + list(added):
+            old = manifest.docs.pop(key, None)
+            if old is not None:
+                manifest.deleted.add(old["id"])
+        manifest.docs.update(refreshed)
+        manifest.docs.update(added)
+        manifest.next_doc += len(added)
+        if segment_name:
+            manifest.segments.append({"name": segment_name, "units": len(writer.units)})
+        manifest.save()
+
+    return {
+        "indexed": len(added),
+        "removed": len(removed),
+        "failed": failed,
+        "unchanged": len(pdfs) - len(to_index),
+        "segments": len(manifest.segments),
+    }
+
+
+def merge_segments(index_dir: Path, max_segments: int = 1) -> int:
+    """Merge segments until at most ``max_segments`` remain; returns segments merged.
+
+    The merge reads a snapshot of the manifest, writes the merged segment without
+    holding the manifest lock, and then swaps it in atomically. Readers keep using
+    the old segments until the new manifest lands, so queries are never blocked.
+    Returns 0 without doing anything if another merge is already running.
+    """
+    index_dir = Path(index_dir)
+    with ExitStack() as stack:
+        try:
+            stack.enter_context(_locked(index_dir / MERGE_LOCK, timeout=0, break_dead=True))
+        except TimeoutError:
+            logger.warning("Skipped merge of %s: another merge is already running", index_dir)
+            return 0
+        return _merge_locked(index_dir, max_segments)
+
+
+def _merge_locked(index_dir: Path, max_segments: int) -> int:
+    with _manifest_lock(index_dir):
+        manifest = IndexManifest.load(index_dir)
+        if len(manifest.segments) <= max(max_segments, 1):
+            return 0
+        # Merge the smallest segments first, like a tiered merge policy
+        count = len(manifest.segments) - max(max_segments, 1) + 1
+        victims = sorted(manifest.segments, key=lambda seg: seg["units"])[:count]
+        deleted = set(manifest.deleted)
+        merged_name = manifest.new_segment_name()
+        manifest.save()
+
+    writer = SegmentWriter()
+    dropped: Set[int] = set()
+    for seg in victims:
+        segment = Segment(index_dir / seg["name"])
+        live = []
+        for doc_id, doc_path, _ in segment.documents():
+            if doc_id in deleted:
+                dropped.add(doc_id)
+            else:
+                live.append((doc_id, doc_path))
+        pages: Dict[int, List[Tuple[int, str]]] = {doc_id: [] for doc_id, _ in live}
+        for doc_id, page, text in segment.pages(set(pages)):
+            pages[doc_id].append((page, text))
+        segment.close()
+        for doc_id, doc_path in live:
+            writer.add_document(doc_id, doc_path, pages[doc_id])
+    if writer.docs:
+        writer.write(index_dir / merged_name)
+    victim_names = {seg["name"] for seg in victims}
+
+    with _manifest_lock(index_dir):
+        manifest = IndexManifest.load(index_dir)
+        manifest.segments = [s for s in manifest.segments if s["name"] not in victim_names]
+        if writer.docs:
+            manifest.segments.append({"name": merged_name, "units": len(writer.units)})
+        # A document id lives in exactly one segment, so these tombstones are done
+        manifest.deleted -= dropped
+        manifest.save()
+
+    for name in victim_names:
+        # May fail on Windows while a reader still maps the files; harmless once
+        # the segment is out of the manifest
+        shutil.rmtree(index_dir / name, ignore_errors=True)
+    return len(victims)
+
+
+class SearchIndex:
+    """Read side of the index: boolean/phrase matching plus BM25 scoring.
+
+    Opens every live segment listed in the manifest and hides tombstoned documents.
+    """
+
+    def __init__(self, index_dir: Path):
+        index_dir = Path(index_dir)
+        if not (index_dir / MANIFEST_FILE).exists():
+            raise FileNotFoundError(f"No search index at {index_dir}")
+        for attempt in range(3):
+            manifest = IndexManifest.load(index_dir)
+            try:
+                self.segments = _open_segments(index_dir, manifest.segments)
+                break
+            except FileNotFoundError:
+                # A merge swapped segments between reading the manifest and opening them
+                if attempt == 2:
+                    raise
+        self.index_dir = index_dir
+        self.engine = manifest.engine
+        # Changes whenever documents are added, replaced, removed, or merged
+        self.generation = "|".join(
+            [seg["name"] for seg in manifest.segments] + [str(d) for d in sorted(manifest.deleted)]
+        )
+        self.deleted = manifest.deleted
+        # Like Lucene, collection statistics still count tombstoned pages until a merge
+        # drops them; that keeps opening the index free of per-page work
+        self.unit_total = sum(segment.unit_count for segment in self.segments)
+        total_length = sum(segment.total_length for segment in self.segments)
+        self.avg_length = total_length / self.unit_total if self.unit_total else 0.0
+        self._postings_memo: Dict[str, Dict[UnitKey, List[int]]] = {}
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+
+    @property
+    def max_pages(self) -> int:
+        return max((segment.max_pages for segment in self.segments), default=0)
+
+    def iter_pages(self) -> Iterator[Tuple[str, int, str]]:
+        """Yield ``(path, page, text)`` for every live page in the index."""
+        for segment in self.segments:
+            paths = {doc_id: doc_path for doc_id, doc_path, _ in segment.documents()}
+            for i in range(segment.unit_count):
+                doc_id, page, _ = segment.unit(i)
+                if doc_id not in self.deleted:
+                    yield paths[doc_id], page, segment.text(i)
+
+    def _unit(self, key: UnitKey) -> Tuple[int, int, int]:
+        return self.segments[key[0]].unit(key[1])
+
+    def _is_live(self, key: UnitKey) -> bool:
+        return not self.deleted or self._unit(key)[0] not in self.deleted
+
+    def _term_postings(self, term: str) -> Dict[UnitKey, List[int]]:
+        plist = self._postings_memo.get(term)
+        if plist is None:
+            plist = {}
+            for seg_no, segment in enumerate(self.segments):
+                for unit, positions in segment.postings(term):
+                    if self._is_live((seg_no, unit)):
+                        plist[(seg_no, unit)] = positions
+            self._postings_memo[term] = plist
+        return plist
+
+    def _all_units(self) -> Set[UnitKey]:
+        return {
+            (seg_no, unit)
+            for seg_no, segment in enumerate(self.segments)
+            for unit in range(segment.unit_count)
+            if self._is_live((seg_no, unit))
+        }
+
+    def _phrase_units(self, terms: List[str]) -> Set[UnitKey]:
+        if not terms:
+            return set()
+        lists = [self._term_postings(t) for t in terms]
+        candidates = set(lists[0])
+        for plist in lists[1:]:
+            candidates &= set(plist)
+        matched = set()
+        for unit in candidates:
+            starts = set(lists[0][unit])
+            for offset, plist in enumerate(lists[1:], 1):
+                starts &= {p - offset for p in plist[unit]}
+                if not starts:
+                    break
+            if starts:
+                matched.add(unit)
+        return matched
+
+    # -- query parsing ---------------------------------------------------
+    def _parse(self, query: str):
+        tokens = []
+        for phrase, lparen, rparen, neg, word in _QUERY_RE.findall(query):
+            if lparen:
+                tokens.append(("(", None))
+            elif rparen:
+                tokens.append((")", None))
+            elif word in ("AND", "OR", "NOT") and not neg:
+                tokens.append((word, None))
+            elif phrase or word:
+                terms = tokenize(phrase or word)
+                if neg:
+                    tokens.append(("NOT", None))
+                if terms:
+                    tokens.append(("TERMS", terms))
+        self._tokens = tokens
+        self._pos = 0
+        self._scoring_terms: List[str] = []
+        node = self._parse_or()
+        return node
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._pos][0] if self._pos < len(self._tokens) else None
+
+    def _parse_or(self):
+        nodes = [self._parse_and()]
+        while self._peek() == "OR":
+            self._pos += 1
+            nodes.append(self._parse_and())
+        return ("OR", nodes) if len(nodes) > 1 else nodes[0]
+
+    def _parse_and(self):
+        nodes = []
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self._pos += 1
+                continue
+            nodes.append(self._parse_unary())
+        if not nodes:
+            return ("EMPTY", None)
+        return ("AND", nodes) if len(nodes) > 1 else nodes[0]
+
+    def _parse_unary(self, negated: bool = False):
+        kind, value = self._tokens[self._pos]
+        self._pos += 1
+        if kind == "NOT":
+            if self._peek() is None:
+                return ("EMPTY", None)
+            return ("NOT", self._parse_unary(negated=not negated))
+        if kind == "(":
+            node = self._parse_or()
+            if self._peek() == ")":
+                self._pos += 1
+            return node
+        if kind == "TERMS":
+            if not negated:
+                self._scoring_terms.extend(value)
+            return ("PHRASE", value) if len(value) > 1 else ("TERM", value[0])
+        return ("EMPTY", None)
+
+    def _evaluate(self, node) -> Set[UnitKey]:
+        kind, value = node
+        if kind == "TERM":
+            return set(self._term_postings(value))
+        if kind == "PHRASE":
+            return self._phrase_units(value)
+        if kind == "AND":
+            positives = [n for n in value if n[0] != "NOT"]
+            negatives = [n for n in value if n[0] == "NOT"]
+            result = (
+                set.intersection(*(self._evaluate(n) for n in positives))
+                if positives
+                else self._all_units()
+            )
+            for n in negatives:
+                result -= self._evaluate(n[1])
+            return result
+        if kind == "OR":
+            return set().union(*(self._evaluate(n) for n in value))
+        if kind == "NOT":
+            return self._all_units() - self._evaluate(value)
+        return set()
+
+    # -- ranking ---------------------------------------------------------
+    def _bm25(self, units: Set[UnitKey], terms: List[str]) -> Dict[UnitKey, float]:
+        total = self.unit_total
+        scores = {unit: 0.0 for unit in units}
+        for term in set(terms):
+            plist = self._term_postings(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (total - len(plist) + 0.5) / (len(plist) + 0.5))
+            for unit in units:
+                positions = plist.get(unit)
+                if not positions:
+                    continue
+                tf = len(positions)
+                length = self._unit(unit)[2]
+                norm = K1 * (1 - B + B * length / (self.avg_length or 1))
+                scores[unit] += idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+    def snippet(self, unit: UnitKey, terms: List[str], width: int = 160) -> str:
+        text = self.segments[unit[0]].text(unit[1])
+        lowered = text.lower()
+        start = 0
+        for term in terms:
+            match = re.search(r"\b" + re.escape(term) + r"\b", lowered)
+            if match:
+                start = max(match.start() - width // 3, 0)
+                break
+        snippet = " ".join(text[start : start + width].split())
+        return ("…" if start else "") + snippet + ("…" if start + width < len(text) else "")
+
+    def search(
+        self, query: str, limit: int = 10, pages: Optional[Set[int]] = None
+    ) -> List[Hit]:
+        """Return the top ``limit`` pages matching ``query``.
+
+        ``pages`` optionally restricts results to zero-based page indexes.
+        """
+        matched = self._evaluate(self._parse(query))
+        if pages is not None:
+            matched = {u for u in matched if self._unit(u)[1] in pages}
+        terms = self._scoring_terms
+        scores = self._bm25(matched, terms)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        hits = []
+        for unit, score in ranked:
+            doc_id, page, _ = self._unit(unit)
+            path = self.segments[unit[0]].doc_path(doc_id)
+            hits.append(Hit(path, page, score, self.snippet(unit, terms)))
+        return hits
@@ -0,0 +1,381 @@
+"""Local, dependency-light semantic retrieval over extracted page text.
+
+Pages are split into overlapping chunks, either plain word windows or paragraph-
+and heading-aware groups of layout blocks, embedded with a hashed
+TF-IDF model (unigrams and bigrams hashed into a fixed number of signed buckets),
+and stored as one contiguous float32 matrix. Answering a question is a single
+matrix-vector product followed by a partial sort, with no network access and no
+model download. NumPy is the only extra requirement (``pip install .[ask]``).
+
+Large corpora can swap the float matrix for an IVF-PQ index (see ``ann``), which
+keeps a few bytes per chunk and scores only the ``nprobe`` closest inverted lists.
+"""
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+from .extractors import BBox, TextBlock
+from .search import tokenize
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import numpy as np
+
+    from .ann import IVFPQIndex
+
+DEFAULT_DIM = 2048
+CHUNK_WORDS = 120
+CHUNK_OVERLAP = 30
+ANN_MIN_CHUNKS = 50_000  # below this an exact scan is fast enough
+DEFAULT_NPROBE = 8
+
+VECTORS_DIR = "vectors"
+_MATRIX_FILE = "matrix.npy"
+_IDF_FILE = "idf.npy"
+_CHUNKS_FILE = "chunks.json"
+_META_FILE = "meta.json"
+_ANN_DIR = "ivfpq"
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("The ask command needs NumPy: pip install 'pdf-reader-cli[ask]'") from exc
+    return numpy
+
+
+# (page, x0, top, x1, bottom) for each block a chunk was built from
+Box = Tuple[int, float, float, float, float]
+
+
+@dataclass
+class Chunk:
+    path: str
+    page: int  # zero-based, where the chunk starts
+    text: str
+    boxes: List[Box] = field(default_factory=list)
+
+
+@dataclass
+class Passage:
+    path: str
+    page: int  # zero-based
+    score: float
+    text: str
+    boxes: List[Box] = field(default_factory=list)
+
+
+def chunk_pages(
+    pages: Iterable[Tuple[str, int, str]],
+    words: int = CHUNK_WORDS,
+    overlap: int = CHUNK_OVERLAP,
+) -> Iterator[Chunk]:
+    """Split ``(path, page, text)`` triples into overlapping windows of ``words`` words."""
+    step = max(words - overlap, 1)
+    for path, page, text in pages:
+        tokens = text.split()
+        for start in range(0, max(len(tokens) - overlap, 1), step):
+            window = tokens[start : start + words]
+            if window:
+                yield Chunk(path, page, " ".join(window))
+
+
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)+|\d+\.?\s+\S|[A-Z](\.\d+)+)")
+
+
+def _is_heading(block: TextBlock, words: List[str], body_size: Optional[float]) -> bool:
+    """Block opening with a numbered title line, or short and larger than body text/all caps."""
+    first_line = block.text.splitlines()[0].strip()
+    if _NUMBERED_HEADING.match(first_line) and len(first_line.split()) <= 12 and not first_line.endswith("."):
+        return True
+    if len(words) > 20 or block.text.rstrip().endswith((".", ",", ";", ":")):
+        return False
+    if block.size and body_size and block.size >= body_size * 1.15:
+        return True
+    return len(words) <= 12 and first_line.isupper()
+
+
+def chunk_blocks(
+    pages: Iterable[Tuple[str, int, List[TextBlock]]],
+    words: int = CHUNK_WORDS,
+    overlap: int = CHUNK_OVERLAP,
+) -> Iterator[Chunk]:
+    """Group ``(path, page, blocks)`` into chunks of up to ``words`` words.
+
+    Chunks end at paragraph boundaries where possible and before a heading (unless
+    that would leave a fragment under ``words // 4``), so a section's title leads
+    its first chunk. A chunk cut inside or after a
+    paragraph repeats the last ``overlap`` words in the next one; chunks never span
+    sections or documents. Pages are consumed lazily, so chunks come out while the
+    rest of the document is still being extracted.
+    """
+    overlap = min(overlap, words - 1)
+    sizes: Counter = Counter()  # words per font size, to estimate the body size
+    path = None
+    parts: List[Tuple[int, Optional[BBox], List[str]]] = []  # (page, bbox, words)
+
+    def emit(keep_overlap: bool) -> Iterator[Chunk]:
+        nonlocal parts
+        if not parts:
+            return
+        text = " ".join(w for _, _, part in parts for w in part)
+        boxes = [(page, *bbox) for page, bbox, _ in parts if bbox is not None]
+        yield Chunk(path, parts[0][0], text, list(dict.fromkeys(boxes)))
+        tail: List[Tuple[int, Optional[BBox], List[str]]] = []
+        need = overlap if keep_overlap else 0
+        for page, bbox, part in reversed(parts):
+            if need <= 0:
+                break
+            tail.insert(0, (page, bbox, part[-need:]))
+            need -= len(part)
+        parts = tail
+
+    for doc, page, blocks in pages:
+        if doc != path:
+            yield from emit(False)
+            path = doc
+            sizes.clear()
+        for block in blocks:
+            tokens = block.text.split()
+            if not tokens:
+                continue
+            body_size = sizes.most_common(1)[0][0] if sizes else None
+            count = sum(len(part) for _, _, part in parts)
+            if _is_heading(block, tokens, body_size):
+                if count >= words // 4:  # table cells and captions stay with their neighbours
+                    yield from emit(False)
+                    count = 0
+            elif block.size:
+                sizes[round(block.size, 1)] += len(tokens)
+
+            # Prefer to break between paragraphs once the chunk is half full
+            if count + len(tokens) > words and count >= words // 2:
+                yield from emit(True)
+                count = sum(len(part) for _, _, part in parts)
+            while tokens:
+                room = words - count
+                parts.append((page, block.bbox, tokens[:room]))
+                tokens = tokens[room:]
+                if tokens:  # paragraph longer than the space left
+                    yield from emit(True)
+                    count = sum(len(part) for _, _, part in parts)
+    yield from emit(False)
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class HashingEmbedder:
+    """Hashed TF-IDF embeddings; ``fit`` learns IDF weights from the corpus."""
+
+    def __init__(self, dim: int = DEFAULT_DIM, idf: Optional["np.ndarray"] = None):
+        self.dim = dim
+        self.idf = idf
+
+    def _features(self, text: str) -> List[int]:
+        tokens = tokenize(text)
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+
+    def _term_counts(self, texts: List[str]) -> "np.ndarray":
+        np = _numpy()
+        rows: List[int] = []
+        hashes: List[int] = []
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            rows.extend([row] * len(features))
+            hashes.extend(features)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if hashes:
+            h = np.asarray(hashes, dtype=np.uint32)
+            # Low bits pick the bucket, the top bit picks the sign (reduces collisions' bias)
+            signs = np.where(h >> 31, 1.0, -1.0).astype(np.float32)
+            np.add.at(matrix, (np.asarray(rows), (h % self.dim).astype(np.intp)), signs)
+        return matrix
+
+    def fit(self, texts: List[str]) -> "HashingEmbedder":
+        return self._fit_counts(self._term_counts(texts))
+
+    def _fit_counts(self, counts: "np.ndarray") -> "HashingEmbedder":
+        np = _numpy()
+        return self._fit_df(np.count_nonzero(counts, axis=0), len(counts))
+
+    def _fit_df(self, df: "np.ndarray", n: int) -> "HashingEmbedder":
+        """Set IDF weights from per-bucket document frequencies over ``n`` texts."""
+        np = _numpy()
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        return self
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """Return a C-contiguous ``(len(texts), dim)`` float32 matrix of unit vectors."""
+        return self._weight(self._term_counts(texts))
+
+    def _weight(self, matrix: "np.ndarray") -> "np.ndarray":
+        """Turn raw signed counts into TF-IDF unit vectors, in place."""
+        np = _numpy()
+        np.multiply(np.sign(matrix), np.log1p(np.abs(matrix)), out=matrix)
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return np.ascontiguousarray(matrix)
+
+
+class VectorStore:
+    """Chunk metadata plus their embeddings as one contiguous matrix.
+
+    With an ``ann`` index attached, queries go through it instead and the matrix
+    is optional (a loaded approximate store keeps only the compressed codes).
+    """
+
+    def __init__(
+        self,
+        chunks: List[Chunk],
+        matrix: Optional["np.ndarray"],
+        embedder: HashingEmbedder,
+        ann: Optional["IVFPQIndex"] = None,
+    ):
+        self.chunks = chunks
+        self.matrix = matrix
+        self.embedder = embedder
+        self.ann = ann
+
+    @classmethod
+    def build(
+        cls,
+        chunks: Iterable[Chunk],
+        dim: int = DEFAULT_DIM,
+        batch: int = 256,
+        ann: Optional[bool] = False,
+        nlist: Optional[int] = None,
+        m: int = 64,
+    ) -> "VectorStore":
+        """Embed ``chunks`` as they arrive; only IDF weighting waits for the last one.
+
+        With ``ann`` (None: once there are ``ANN_MIN_CHUNKS`` chunks) the store gets
+        an IVF-PQ index instead of the float matrix, and the matrix is never built:
+        the first pass only counts document frequencies (see ``build_ann``).
+        """
+        np = _numpy()
+        embedder = HashingEmbedder(dim)
+        kept: List[Chunk] = []
+        df = np.zeros(dim, dtype=np.int64)
+        exact = not ann
+        blocks = []  # raw counts, kept only while an exact matrix may be wanted
+        for group in _batched(chunks, batch):
+            counts = embedder._term_counts([c.text for c in group])
+            df += np.count_nonzero(counts, axis=0)
+            kept.extend(group)
+            if exact and ann is None and len(kept) >= ANN_MIN_CHUNKS:
+                exact = False
+                blocks.clear()
+            if exact:
+                blocks.append(counts)
+        embedder._fit_df(df, len(kept))
+        if exact:
+            counts = np.concatenate(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+            return cls(kept, embedder._weight(counts), embedder)
+        store = cls(kept, None, embedder)
+        store.build_ann(nlist=nlist, m=m)
+        return store
+
+    def build_ann(self, nlist: Optional[int] = None, m: int = 64) -> None:
+        """Train an IVF-PQ index; later queries become approximate.
+
+        Without a float matrix, chunks are embedded again from their text: a bounded
+        sample to train the quantizers, then ``ENCODE_BATCH`` at a time for
+        encoding, so only the compressed codes grow with the corpus.
+        """
+        _numpy()
+        from .ann import ENCODE_BATCH, IVFPQIndex
+
+        if not self.chunks:
+            return
+        if self.matrix is not None:
+            self.ann = IVFPQIndex.train(self.matrix, nlist=nlist, m=m)
+            return
+        n = len(self.chunks)
+        sample = self.embedder.embed([self.chunks[i].text for i in IVFPQIndex.sample_ids(n)])
+        batches = (
+            self.embedder.embed([c.text for c in group])
+            for group in _batched(self.chunks, ENCODE_BATCH)
+        )
+        self.ann = IVFPQIndex.train_batches(sample, n, batches, nlist=nlist, m=m)
+
+    def query(self, question: str, top_k: int = 5, nprobe: int = DEFAULT_NPROBE) -> List[Passage]:
+        np = _numpy()
+        if not self.chunks:
+            return []
+        vector = self.embedder.embed([question])[0]
+        if self.ann is not None:
+            scores, top = self.ann.search(vector, k=top_k, nprobe=nprobe)
+        else:
+            all_scores = self.matrix @ vector  # one batched mat-vec over every chunk
+            k = min(top_k, len(all_scores))
+            top = np.argpartition(-all_scores, k - 1)[:k]
+            top = top[np.argsort(-all_scores[top])]
+            scores = all_scores[top]
+        passages = []
+        for i, score in zip(top, scores):
+            chunk = self.chunks[i]
+            passages.append(Passage(chunk.path, chunk.page, float(score), chunk.text, chunk.boxes))
+        return passages
+
+    def save(self, directory: Path, generation: str = "") -> None:
+        np = _numpy()
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / _META_FILE).unlink(missing_ok=True)
+        # Persist either the float matrix or the compressed index, never both
+        if self.ann is not None:
+            (directory / _MATRIX_FILE).unlink(missing_ok=True)
+            self.ann.save(directory / _ANN_DIR)
+        else:
+            shutil.rmtree(directory / _ANN_DIR, ignore_errors=True)
+            np.save(directory / _MATRIX_FILE, self.matrix)
+        np.save(directory / _IDF_FILE, self.embedder.idf)
+        (directory / _CHUNKS_FILE).write_text(
+            json.dumps([[c.path, c.page, c.text, c.boxes] for c in self.chunks], ensure_ascii=False),
+            encoding="utf-8",
+        )
+        # Written last: a store without meta is treated as missing
+        (directory / _META_FILE).write_text(
+            json.dumps({"dim": self.embedder.dim, "generation": generation, "ann": self.ann is not None}),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, directory: Path, generation: Optional[str] = None) -> Optional["VectorStore"]:
+        """Load a saved store; None if missing or built for a different ``generation``."""
+        np = _numpy()
+        meta_path = directory / _META_FILE
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if generation is not None and meta.get("generation") != generation:
+            return None
+        chunks = [
+            Chunk(path, page, text, [tuple(box) for box in boxes])
+            for path, page, text, boxes in json.loads((directory / _CHUNKS_FILE).read_text("utf-8"))
+        ]
+        embedder = HashingEmbedder(meta["dim"], np.load(directory / _IDF_FILE))
+        if meta.get("ann"):
+            from .ann import IVFPQIndex
+
+            return cls(chunks, None, embedder, IVFPQIndex.load(directory / _ANN_DIR))
+        matrix = np.load(directory / _MATRIX_FILE, mmap_mode="r")
+        return cls(chunks, matrix, embedder)
@@ -0,0 +1,291 @@
+"""Virtualized multi-page views for the Qt viewer: continuous scrolling and thumbnails.
+
+Both views lay out placeholder rectangles from the page sizes alone, so opening
+a long document costs nothing per page, and only ask the shared
+``RenderScheduler`` for the pages in or near the viewport. Rendered images live
+in the ``RenderCache``, so memory stays bounded however far the user scrolls.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from PyQt5.QtCore import QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter, QPen
+from PyQt5.QtWidgets import QAbstractScrollArea, QWidget
+
+from .document import DocumentSession
+from .render import RenderCache, RenderKey, RenderScheduler, render_key
+
+PAGE_SPACING = 10  # pixels around and between pages
+THUMBNAIL_WIDTH = 120  # pixels
+OVERSCAN_SCREENS = 1  # also render this many viewport heights above and below
+
+
+class PageColumn(QAbstractScrollArea):
+    """Pages stacked top to bottom and centred, painted from the render cache.
+
+    Subclasses pick the scale of each page (``page_scale``) and the scheduler
+    ``client`` name. Pages without a cached image are painted as blank
+    placeholders and queued; they are repainted when the scheduler announces
+    them. Nothing is rendered for pages far from the viewport.
+    """
+
+    client = ""
+
+    def __init__(self, scheduler: RenderScheduler, cache: RenderCache, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.cache = cache
+        self.session: Optional[DocumentSession] = None
+        self._sizes: List[Tuple[float, float]] = []
+        # Per page: top edge, width and height in content pixels
+        self._tops: List[int] = []
+        self._boxes: List[Tuple[int, int]] = []
+        self._content_width = 0
+        self._content_height = 0
+        self.verticalScrollBar().setSingleStep(40)
+        self.horizontalScrollBar().setSingleStep(40)
+        scheduler.rendered.connect(self._on_rendered)
+
+    def set_session(self, session: Optional[DocumentSession]) -> None:
+        """Show ``session`` from its first page (None to show nothing)."""
+        if session is self.session:
+            return
+        self.scheduler.cancel(self.client)
+        self.session = session
+        self._sizes = session.page_sizes() if session is not None else []
+        self._layout()
+        self.verticalScrollBar().setValue(0)
+        self.viewport().update()
+        self._schedule()
+
+    def page_scale(self, index: int) -> float:
+        raise NotImplementedError
+
+    def page_at(self, y: int) -> int:
+        """Index of the page at content height ``y`` (the one above, in a gap)."""
+        return max(bisect_right(self._tops, y) - 1, 0)
+
+    def page_rect(self, index: int) -> QRect:
+        """Where page ``index`` is drawn, in viewport coordinates."""
+        width, height = self._boxes[index]
+        left = (max(self._content_width, self.viewport().width()) - width) // 2
+        return QRect(
+            left - self.horizontalScrollBar().value(),
+            self._tops[index] - self.verticalScrollBar().value(),
+            width,
+            height,
+        )
+
+    def scroll_to_page(self, index: int) -> None:
+        if 0 <= index < len(self._tops):
+            self.verticalScrollBar().setValue(self._tops[index] - PAGE_SPACING)
+
+    def relayout(self) -> None:
+        """Recompute page geometry (e.g. after a zoom change), keeping the view on the same spot."""
+        if not self._tops:
+            self._layout()
+            return
+        y = self.verticalScrollBar().value()
+        index = self.page_at(y)
+        fraction = (y - self._tops[index]) / max(self._boxes[index][1], 1)
+        self._layout()
+        self.verticalScrollBar().setValue(self._tops[index] + int(fraction * self._boxes[index][1]))
+        self.viewport().update()
+        self._schedule()
+
+    def _layout(self) -> None:
+        self._tops, self._boxes = [], []
+        y = PAGE_SPACING
+        for index, (width, height) in enumerate(self._sizes):
+            scale = self.page_scale(index)
+            self._tops.append(y)
+            self._boxes.append((int(width * scale), int(height * scale)))
+            y += self._boxes[-1][1] + PAGE_SPACING
+        self._content_width = max((w for w, _ in self._boxes), default=0) + 2 * PAGE_SPACING
+        self._content_height = y
+        self._update_scrollbars()
+
+    def _update_scrollbars(self) -> None:
+        viewport = self.viewport().size()
+        vbar, hbar = self.verticalScrollBar(), self.horizontalScrollBar()
+        vbar.setRange(0, max(self._content_height - viewport.height(), 0))
+        vbar.setPageStep(viewport.height())
+        hbar.setRange(0, max(self._content_width - viewport.width(), 0))
+        hbar.setPageStep(viewport.width())
+
+    def _visible_pages(self, top: int, bottom: int) -> range:
+        if not self._tops:
+            return range(0)
+        first = self.page_at(top)
+        last = min(self.page_at(bottom), len(self._tops) - 1)
+        return range(first, last + 1)
+
+    def _schedule(self) -> None:
+        """Queue renders for the visible pages, nearest the middle first, then the overscan."""
+        if self.session is None or not self.isVisible():
+            self.scheduler.cancel(self.client)
+            return
+        height = self.viewport().height()
+        top = self.verticalScrollBar().value()
+        middle = top + height // 2
+        visible = sorted(
+            self._visible_pages(top, top + height),
+            key=lambda i: abs(self._tops[i] + self._boxes[i][1] // 2 - middle),
+        )
+        margin = OVERSCAN_SCREENS * height
+        nearby = [
+            i for i in self._visible_pages(top - margin, top + height + margin) if i not in visible
+        ]
+        nearby.sort(key=lambda i: abs(self._tops[i] - middle))
+        self.scheduler.request(
+            self.client, [(self.session, i, self.page_scale(i)) for i in visible + nearby]
+        )
+
+    def _on_rendered(self, key: RenderKey, image) -> None:
+        if self.session is None or key[0] != self.session.path or not self.isVisible():
+            return
+        index = key[1]
+        if index < len(self._boxes) and key == render_key(self.session.path, index, self.page_scale(index)):
+            rect = self.page_rect(index)
+            if rect.intersects(self.viewport().rect()):
+                self.viewport().update(rect)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), QColor("#e0e0e0"))
+        if self.session is not None:
+            top = self.verticalScrollBar().value()
+            for index in self._visible_pages(top + event.rect().top(), top + event.rect().bottom()):
+                rect = self.page_rect(index)
+                image = self.cache.get(render_key(self.session.path, index, self.page_scale(index)))
+                if image is not None:
+                    painter.drawImage(rect, image)
+                else:
+                    painter.fillRect(rect, Qt.white)
+                    painter.setPen(QColor("#999"))
+                    painter.drawText(rect, Qt.AlignCenter, str(index + 1))
+                self.paint_decoration(painter, index, rect)
+        painter.end()
+
+    def paint_decoration(self, painter: QPainter, index: int, rect: QRect) -> None:
+        """Hook for drawing over a page (e.g. the current-page highlight)."""
+        painter.setPen(QColor("#bbb"))
+        painter.drawRect(rect.adjusted(0, 0, -1, -1))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.relayout()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.scheduler.cancel(self.client)
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        self.viewport().update()
+        self._schedule()
+
+
+class ContinuousView(PageColumn):
+    """The whole document as one scrolling column, at fit-width or a fixed scale.
+
+    ``page_changed`` reports the page under the upper third of the viewport as
+    the user scrolls.
+    """
+
+    client = "continuous"
+    page_changed = pyqtSignal(int)
+
+    def __init__(self, scheduler: RenderScheduler, cache: RenderCache, parent: Optional[QWidget] = None):
+        super().__init__(scheduler, cache, parent)
+        self.zoom: Optional[float] = None  # render scale; None fits the widest page to the width
+        self._max_width = 0.0
+        self._current = 0
+
+    def set_session(self, session: Optional[DocumentSession]) -> None:
+        self._current = 0
+        super().set_session(session)
+
+    def _layout(self) -> None:
+        self._max_width = max((w for w, _ in self._sizes), default=0.0)
+        super()._layout()
+
+    def set_zoom(self, zoom: Optional[float]) -> None:
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.relayout()
+
+    def page_scale(self, index: int) -> float:
+        if self.zoom is not None:
+            return self.zoom
+        if not self._max_width:
+            return 1.0
+        # One scale for every page keeps their relative sizes (and shares cache keys)
+        width = self.viewport().width() - 2 * PAGE_SPACING
+        return round(max(width / self._max_width, 0.05), 3)
+
+    def current_page(self) -> int:
+        return self.page_at(self.verticalScrollBar().value() + self.viewport().height() // 3)
+
+    def scroll_to_page(self, index: int) -> None:
+        super().scroll_to_page(index)
+        # A jump lands the page at the top; report it even if the third line is past it
+        self._current = index
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        super().scrollContentsBy(dx, dy)
+        index = self.current_page()
+        if dy and self._tops and index != self._current:
+            self._current = index
+            self.page_changed.emit(index)
+
+
+class ThumbnailStrip(PageColumn):
+    """A narrow column of page thumbnails; clicking one emits ``page_clicked``."""
+
+    client = "thumbnails"
+    page_clicked = pyqtSignal(int)
+
+    def __init__(self, scheduler: RenderScheduler, cache: RenderCache, parent: Optional[QWidget] = None):
+        super().__init__(scheduler, cache, parent)
+        self.current = 0
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setFixedWidth(THUMBNAIL_WIDTH + 2 * PAGE_SPACING + self.verticalScrollBar().sizeHint().width())
+
+    def set_session(self, session: Optional[DocumentSession]) -> None:
+        self.current = 0
+        super().set_session(session)
+
+    def page_scale(self, index: int) -> float:
+        return round(THUMBNAIL_WIDTH / max(self._sizes[index][0], 1.0), 3)
+
+    def set_current(self, index: int) -> None:
+        """Highlight page ``index`` and scroll it into view."""
+        if not 0 <= index < len(self._tops):
+            return
+        self.current = index
+        rect = self.page_rect(index)
+        if rect.top() < 0 or rect.bottom() > self.viewport().height():
+            self.verticalScrollBar().setValue(
+                self._tops[index] - (self.viewport().height() - rect.height()) // 2
+            )
+        self.viewport().update()
+
+    def paint_decoration(self, painter: QPainter, index: int, rect: QRect) -> None:
+        if index == self.current:
+            painter.setPen(QPen(QColor("#0066cc"), 3))
+            painter.drawRect(rect.adjusted(-2, -2, 1, 1))
+        else:
+            super().paint_decoration(painter, index, rect)
+
+    def mousePressEvent(self, event):
+        if self.session is None or event.button() != Qt.LeftButton:
+            return
+        index = self.page_at(event.pos().y() + self.verticalScrollBar().value())
+        if self.page_rect(index).contains(event.pos()):
+            self.page_clicked.emit(index)
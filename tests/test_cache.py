@@ -0,0 +1,26 @@
+from pdf_reader.cache import TextCache
+
+
+def test_get_returns_line_endings_unchanged(tmp_path):
+    cache = TextCache(tmp_path)
+    key = TextCache.key("digest", 0, "pymupdf")
+    text = "a\r\nb\rc\n"
+    cache.put(key, text)
+    assert cache.get(key) == text
+
+
+def test_put_does_not_scan_the_cache(tmp_path, monkeypatch):
+    TextCache(tmp_path).put(TextCache.key("digest", 0, "pymupdf"), "x")
+
+    def scan(self):
+        raise AssertionError("put scanned the cache directory")
+
+    monkeypatch.setattr(TextCache, "stats", scan)
+    TextCache(tmp_path).put(TextCache.key("digest", 1, "pymupdf"), "y")
+
+
+def test_size_is_shared_between_instances(tmp_path):
+    for page in range(6):
+        # A fresh instance per page, like a worker process per document
+        TextCache(tmp_path, max_bytes=4096).put(TextCache.key("digest", page, "pymupdf"), "x" * 1000)
+    assert TextCache(tmp_path).stats()["bytes"] <= 4096
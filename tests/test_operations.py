@@ -0,0 +1,29 @@
+import io
+
+from PIL import Image
+
+from pdf_reader.operations import A4_PIXELS, _page_jpeg, images_to_pdf
+
+
+def test_page_jpeg_converts_image_already_at_page_size(tmp_path):
+    path = tmp_path / "page.png"
+    Image.new("RGB", (40, 60), (200, 10, 10)).save(path)
+
+    data, colorspace = _page_jpeg(path, (40, 60))
+
+    with Image.open(io.BytesIO(data)) as img:
+        assert (img.format, img.size) == ("JPEG", (40, 60))
+    assert colorspace == "DeviceRGB"
+
+
+def test_images_to_pdf_with_images_at_page_size(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.png"
+        Image.new("RGB", A4_PIXELS, (i * 80, 0, 0)).save(path)
+        paths.append(path)
+
+    result = images_to_pdf(paths, tmp_path / "out.pdf")
+
+    assert (result.count, result.size) == (3, A4_PIXELS)
+    assert (tmp_path / "out.pdf").read_bytes().startswith(b"%PDF")